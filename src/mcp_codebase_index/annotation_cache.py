@@ -0,0 +1,193 @@
+# mcp-codebase-index - Structural codebase indexer with MCP server
+# Copyright (C) 2026 Michael Doyle
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+#
+# Commercial licensing available. See COMMERCIAL-LICENSE.md for details.
+
+"""Content-addressed on-disk cache for per-file annotation results.
+
+Annotating a file is the dominant cost of a full index build, and most files
+are unchanged between builds. Results are pickled under a cache directory keyed
+by the SHA-256 of the source (raw file bytes when the caller has them), the
+resolved file type, and a version constant, so an unchanged file costs one hash
+and one unpickle instead of a full parse.
+
+For files on disk, a small reference entry keyed by (path, mtime_ns, size)
+records which content entry the file hashed to, so a file whose stat is
+unchanged skips even the read and the hash.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+from collections.abc import Callable
+
+from mcp_codebase_index.annotator import annotate, detect_file_type
+from mcp_codebase_index.models import StructuralMetadata
+
+logger = logging.getLogger(__name__)
+
+# Bump when any annotator's output or the StructuralMetadata schema changes.
+ANNOTATION_CACHE_VERSION = 5
+
+# A file modified this recently may change again within the same mtime tick
+# without its stat changing, so no stat reference is recorded for it yet.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+class AnnotationCache:
+    """Caches annotate() results as pickles under a directory."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.abspath(cache_dir)
+
+    def annotate(self, text: str, source_name: str = "<source>") -> StructuralMetadata:
+        """Annotate text, reusing a cached result when the content is unchanged.
+
+        The key covers the content and the annotator selected for source_name,
+        not the name itself, so identical files share one entry; the returned
+        metadata always carries the caller's source_name.
+        """
+        key = self._key(b"text", text.encode("utf-8", "surrogatepass"), source_name)
+        metadata = self._lookup(key, source_name)
+        if metadata is None:
+            metadata = self._annotate_and_store(key, text, source_name)
+        return metadata
+
+    def annotate_bytes(
+        self,
+        data: bytes,
+        source_name: str,
+        decode: Callable[[bytes], str],
+    ) -> StructuralMetadata:
+        """Like annotate(), but keyed on the raw file bytes.
+
+        Hashing the bytes as read from disk skips the encode pass annotate()
+        needs, and a hit skips decoding as well; decode is only called on a miss.
+        """
+        key = self._key(b"bytes", data, source_name)
+        metadata = self._lookup(key, source_name)
+        if metadata is None:
+            metadata = self._annotate_and_store(key, decode(data), source_name)
+        return metadata
+
+    def annotate_file(
+        self,
+        abs_path: str,
+        source_name: str,
+        read: Callable[[str], bytes],
+        decode: Callable[[bytes], str],
+    ) -> StructuralMetadata:
+        """Like annotate_bytes(), reading abs_path only if its stat has changed.
+
+        A reference entry keyed on the file's path, mtime and size points at the
+        content entry; while it is valid the file is neither read nor hashed.
+        Raises OSError if the file cannot be stat'ed or read.
+        """
+        st = os.stat(abs_path)
+        ref_path = self._entry_path(self._stat_key(abs_path, st, source_name), ".ref")
+        key = self._load_ref(ref_path)
+        if key is not None:
+            metadata = self._lookup(key, source_name)
+            if metadata is not None:
+                return metadata
+
+        # The stat was taken before the read: if the file changes in between,
+        # its new mtime no longer matches the reference recorded below.
+        data = read(abs_path)
+        key = self._key(b"bytes", data, source_name)
+        metadata = self._lookup(key, source_name)
+        if metadata is None:
+            metadata = self._annotate_and_store(key, decode(data), source_name)
+        if st.st_mtime_ns < time.time_ns() - _RACY_WINDOW_NS:
+            self._write_atomic(ref_path, key.encode("ascii"))
+        return metadata
+
+    def _lookup(self, key: str, source_name: str) -> StructuralMetadata | None:
+        metadata = self._load(self._entry_path(key))
+        if metadata is not None:
+            metadata.source_name = source_name
+        return metadata
+
+    def _annotate_and_store(self, key: str, text: str, source_name: str) -> StructuralMetadata:
+        metadata = annotate(text, source_name=source_name)
+        self._store(self._entry_path(key), metadata)
+        return metadata
+
+    def _key(self, kind: bytes, data: bytes, source_name: str) -> str:
+        # sha256 goes through OpenSSL (SHA-NI where available), well above disk
+        # throughput, so hashing is cheap next to reading the file.
+        file_type = (detect_file_type(source_name) or "").encode()
+        h = hashlib.sha256(b"%d\0%s\0%s\0" % (ANNOTATION_CACHE_VERSION, kind, file_type))
+        h.update(data)
+        return h.digest().hex()
+
+    def _stat_key(self, abs_path: str, st: os.stat_result, source_name: str) -> str:
+        # The input is a few dozen bytes, so blake2b's lower setup cost matters
+        # more than throughput here.
+        file_type = detect_file_type(source_name) or ""
+        raw = f"{ANNOTATION_CACHE_VERSION}\0{file_type}\0{abs_path}\0{st.st_mtime_ns}\0{st.st_size}"
+        return hashlib.blake2b(raw.encode("utf-8", "surrogateescape"), digest_size=16).hexdigest()
+
+    def _entry_path(self, key: str, suffix: str = ".pkl") -> str:
+        # Fan out on the first digest byte (256 buckets) to keep directories small.
+        return os.path.join(self.cache_dir, key[:2], key + suffix)
+
+    def _load_ref(self, path: str) -> str | None:
+        try:
+            with open(path, "rb") as f:
+                key = f.read(65).decode("ascii")
+        except (OSError, UnicodeDecodeError):
+            return None
+        if len(key) != 64:
+            return None
+        return key
+
+    def _load(self, path: str) -> StructuralMetadata | None:
+        try:
+            with open(path, "rb") as f:
+                metadata = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (
+            OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError,
+        ) as e:
+            logger.debug("Ignoring unreadable annotation cache entry %s: %s", path, e)
+            return None
+        if not isinstance(metadata, StructuralMetadata):
+            return None
+        return metadata
+
+    def _store(self, path: str, metadata: StructuralMetadata) -> None:
+        self._write_atomic(path, pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _write_atomic(self, path: str, payload: bytes) -> None:
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry.
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.debug("Could not write annotation cache entry %s: %s", path, e)
@@ -18,6 +18,8 @@
 
 """Dispatch layer that selects the appropriate annotator by file type."""
 
+from collections.abc import Callable
+
 from mcp_codebase_index.csharp_annotator import annotate_csharp
 from mcp_codebase_index.generic_annotator import annotate_generic
 from mcp_codebase_index.go_annotator import annotate_go
@@ -44,6 +46,30 @@ _EXTENSION_MAP: dict[str, str] = {
     ".json": "json",
 }
 
+_DISPATCH: dict[str, Callable[[str, str], StructuralMetadata]] = {
+    "python": annotate_python,
+    "text": annotate_text,
+    "typescript": annotate_typescript,
+    "javascript": annotate_typescript,
+    "go": annotate_go,
+    "rust": annotate_rust,
+    "csharp": annotate_csharp,
+    "json": annotate_json,
+}
+
+# Extension -> annotator, so extension-based dispatch is a single lookup.
+_EXT_TO_ANNOTATOR: dict[str, Callable[[str, str], StructuralMetadata]] = {
+    ext: _DISPATCH[file_type] for ext, file_type in _EXTENSION_MAP.items()
+}
+
+
+def detect_file_type(source_name: str) -> str | None:
+    """Return the annotator file type for a source name based on its extension."""
+    dot_idx = source_name.rfind(".")
+    if dot_idx < 0:
+        return None
+    return _EXTENSION_MAP.get(source_name[dot_idx:].lower())
+
 
 def annotate(
     text: str,
@@ -62,26 +88,13 @@ def annotate(
     - .rs -> rust annotator
     - Otherwise -> generic annotator (line-only)
     """
-    if file_type is None:
-        # Detect from source_name extension
-        dot_idx = source_name.rfind(".")
-        if dot_idx >= 0:
-            ext = source_name[dot_idx:].lower()
-            file_type = _EXTENSION_MAP.get(ext)
-
-    if file_type == "python":
-        return annotate_python(text, source_name)
-    elif file_type == "text":
-        return annotate_text(text, source_name)
-    elif file_type in ("typescript", "javascript"):
-        return annotate_typescript(text, source_name)
-    elif file_type == "go":
-        return annotate_go(text, source_name)
-    elif file_type == "rust":
-        return annotate_rust(text, source_name)
-    elif file_type == "csharp":
-        return annotate_csharp(text, source_name)
-    elif file_type == "json":
-        return annotate_json(text, source_name)
+    if file_type is not None:
+        annotator = _DISPATCH.get(file_type, annotate_generic)
     else:
-        return annotate_generic(text, source_name)
+        dot_idx = source_name.rfind(".")
+        annotator = (
+            _EXT_TO_ANNOTATOR.get(source_name[dot_idx:].lower(), annotate_generic)
+            if dot_idx >= 0
+            else annotate_generic
+        )
+    return annotator(text, source_name)
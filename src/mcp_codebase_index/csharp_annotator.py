@@ -35,15 +35,6 @@ from mcp_codebase_index.models import (
 )
 
 
-def _build_line_offsets(text: str, lines: list[str]) -> list[int]:
-    offsets: list[int] = []
-    pos = 0
-    for line in lines:
-        offsets.append(pos)
-        pos += len(line) + 1
-    return offsets
-
-
 def _find_brace_end(lines: list[str], start_line_0: int) -> int:
     """Find the 0-based line where the outermost brace closes,
     skipping strings, verbatim strings, interpolated strings, char literals, and comments."""
@@ -443,7 +434,6 @@ def annotate_csharp(source: str, source_name: str = "<source>") -> StructuralMet
     lines = source.split("\n")
     total_lines = len(lines)
     total_chars = len(source)
-    line_offsets = _build_line_offsets(source, lines)
 
     imports = _parse_using_directives(lines)
 
@@ -705,7 +695,6 @@ def annotate_csharp(source: str, source_name: str = "<source>") -> StructuralMet
         total_lines=total_lines,
         total_chars=total_chars,
         lines=lines,
-        line_char_offsets=line_offsets,
         functions=functions,
         classes=classes,
         imports=imports,
@@ -20,6 +20,7 @@
 
 from __future__ import annotations
 
+import os
 import subprocess
 from dataclasses import dataclass, field
 
@@ -39,11 +40,14 @@ class GitChangeSet:
 
 def is_git_repo(root_path: str) -> bool:
     """Check if the given path is inside a git work tree."""
+    if _find_git_dir(root_path) is not None:
+        return True
     try:
         result = subprocess.run(
             ["git", "rev-parse", "--is-inside-work-tree"],
             cwd=root_path,
             capture_output=True,
+            stdin=subprocess.DEVNULL,
             text=True,
             timeout=10,
         )
@@ -54,11 +58,17 @@ def is_git_repo(root_path: str) -> bool:
 
 def get_head_commit(root_path: str) -> str | None:
     """Get the current HEAD commit hash."""
+    git_dir = _find_git_dir(root_path)
+    if git_dir is not None:
+        commit = _read_head_commit(git_dir)
+        if commit is not None:
+            return commit
     try:
         result = subprocess.run(
             ["git", "rev-parse", "HEAD"],
             cwd=root_path,
             capture_output=True,
+            stdin=subprocess.DEVNULL,
             text=True,
             timeout=10,
         )
@@ -69,11 +79,139 @@ def get_head_commit(root_path: str) -> str | None:
         return None
 
 
+def _find_git_dir(root_path: str) -> str | None:
+    """Locate the git directory for a work tree without spawning git.
+
+    Walks up from root_path looking for a ``.git`` directory or gitfile, the
+    same discovery git itself does. Returns None whenever the answer is not
+    clear-cut (GIT_DIR overrides, paths inside the git directory itself, bare
+    repos) so callers fall back to asking git.
+    """
+    found = _find_work_tree(os.path.abspath(root_path))
+    return found[1] if found is not None else None
+
+
+def _find_work_tree(path: str) -> tuple[str, str] | None:
+    """Find the work tree containing the absolute *path*, and its git directory.
+
+    Returns (work_tree, git_dir), or None under the same conditions as
+    _find_git_dir.
+    """
+    if "GIT_DIR" in os.environ or "GIT_WORK_TREE" in os.environ:
+        return None
+    if ".git" in path.split(os.sep):
+        return None
+
+    while True:
+        candidate = os.path.join(path, ".git")
+        if os.path.isdir(candidate):
+            if not os.path.isfile(os.path.join(candidate, "HEAD")):
+                return None
+            return path, candidate
+        if os.path.isfile(candidate):
+            # Worktrees and submodules use a gitfile: "gitdir: <path>"
+            try:
+                with open(candidate, encoding="utf-8") as f:
+                    content = f.read().strip()
+            except OSError:
+                return None
+            if not content.startswith("gitdir:"):
+                return None
+            git_dir = os.path.join(path, content[len("gitdir:"):].strip())
+            if not os.path.isfile(os.path.join(git_dir, "HEAD")):
+                return None
+            return path, git_dir
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _work_tree_prefix(root_path: str) -> bytes | None:
+    """Path of root_path below the top of its work tree.
+
+    Matches ``git rev-parse --show-prefix``: empty at the top, otherwise ending
+    in "/". Worked out from the directory layout when discovery is clear-cut;
+    otherwise git is asked. Returns None when git fails.
+    """
+    path = os.path.realpath(root_path)
+    found = _find_work_tree(path)
+    if found is not None:
+        rel = os.path.relpath(path, found[0])
+        return b"" if rel == os.curdir else os.fsencode(rel.replace(os.sep, "/") + "/")
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--show-prefix"],
+            cwd=root_path,
+            capture_output=True,
+            stdin=subprocess.DEVNULL,
+            text=False,
+            timeout=10,
+            check=False,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.rstrip(b"\n")
+
+
+def _read_head_commit(git_dir: str) -> str | None:
+    """Resolve HEAD to a commit hash by reading the git directory directly.
+
+    Handles a detached HEAD, loose refs, and packed-refs. Returns None for
+    anything else (e.g. an unborn branch) so the caller can defer to git.
+    """
+    try:
+        with open(os.path.join(git_dir, "HEAD"), encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+
+    if not head.startswith("ref:"):
+        return head if _is_object_id(head) else None
+    ref = head[len("ref:"):].strip()
+
+    # Linked worktrees keep shared refs in the common dir.
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir"), encoding="utf-8") as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+
+    for base in dict.fromkeys((git_dir, common_dir)):
+        try:
+            with open(os.path.join(base, ref), encoding="utf-8") as f:
+                commit = f.read().strip()
+        except OSError:
+            continue
+        return commit if _is_object_id(commit) else None
+
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0] if _is_object_id(parts[0]) else None
+    except OSError:
+        pass
+    return None
+
+
+def _is_object_id(value: str) -> bool:
+    """True for a full SHA-1 or SHA-256 hex object id."""
+    return len(value) in (40, 64) and all(c in "0123456789abcdef" for c in value)
+
+
 def get_changed_files(root_path: str, since_ref: str | None) -> GitChangeSet:
     """Get files changed since a given git ref.
 
     Combines committed changes (since_ref..HEAD), staged changes,
     unstaged changes, and untracked files into a single GitChangeSet.
+    The last three come from a single ``git status`` call. Paths are
+    relative to root_path, and changes outside it are left out, also when
+    root_path is a subdirectory of the repository.
     """
     if since_ref is None:
         return GitChangeSet()
@@ -83,31 +221,28 @@ def get_changed_files(root_path: str, since_ref: str | None) -> GitChangeSet:
     deleted: set[str] = set()
 
     # 1. Committed changes since the ref
-    _parse_diff_output(root_path, ["git", "diff", "--name-status", since_ref, "HEAD"],
-                       modified, added, deleted)
-
-    # 2. Unstaged changes
-    _parse_diff_output(root_path, ["git", "diff", "--name-status"],
-                       modified, added, deleted)
-
-    # 3. Staged changes
-    _parse_diff_output(root_path, ["git", "diff", "--name-status", "--cached"],
-                       modified, added, deleted)
+    _parse_diff_output(
+        root_path, ["git", "diff", "--name-status", "--relative", since_ref, "HEAD"],
+        modified, added, deleted,
+    )
 
-    # 4. Untracked files
+    # 2. Working-tree state: staged, unstaged, and untracked files in one call.
+    # Porcelain output is always relative to the top of the work tree, so
+    # limit it to root_path and strip root_path's prefix from each path.
+    prefix = _work_tree_prefix(root_path)
+    if prefix is None:
+        prefix = b""
     try:
         result = subprocess.run(
-            ["git", "ls-files", "--others", "--exclude-standard"],
+            ["git", "status", "--porcelain=v2", "-z", "--untracked-files=all", "--", "."],
             cwd=root_path,
             capture_output=True,
-            text=True,
+            stdin=subprocess.DEVNULL,
+            text=False,
             timeout=10,
         )
         if result.returncode == 0:
-            for line in result.stdout.strip().splitlines():
-                path = line.strip()
-                if path:
-                    added.add(path)
+            _parse_porcelain_v2(result.stdout, modified, added, deleted, prefix)
     except (FileNotFoundError, subprocess.TimeoutExpired):
         pass
 
@@ -137,7 +272,8 @@ def _parse_diff_output(
             cmd,
             cwd=root_path,
             capture_output=True,
-            text=True,
+            stdin=subprocess.DEVNULL,
+            text=False,
             timeout=10,
         )
         if result.returncode != 0:
@@ -145,21 +281,98 @@ def _parse_diff_output(
     except (FileNotFoundError, subprocess.TimeoutExpired):
         return
 
-    for line in result.stdout.strip().splitlines():
-        parts = line.split("\t")
+    # Work on the raw bytes and decode only the paths we keep.
+    for line in result.stdout.split(b"\n"):
+        parts = line.split(b"\t")
         if len(parts) < 2:
             continue
         status = parts[0]
-        path = parts[1]
+        path = os.fsdecode(parts[1])
 
-        if status == "M":
+        if status == b"M":
             modified.add(path)
-        elif status == "A":
+        elif status == b"A":
             added.add(path)
-        elif status == "D":
+        elif status == b"D":
             deleted.add(path)
-        elif status.startswith("R"):
+        elif status.startswith(b"R"):
             # Rename: delete old path, add new path
             deleted.add(path)
             if len(parts) >= 3:
-                added.add(parts[2])
+                added.add(os.fsdecode(parts[2]))
+
+
+def _apply_status_code(
+    code: str, path: str, modified: set[str], added: set[str], deleted: set[str]
+) -> None:
+    """Record one index or worktree status letter the way git diff --name-status would."""
+    if code == "M":
+        modified.add(path)
+    elif code == "A":
+        added.add(path)
+    elif code == "D":
+        deleted.add(path)
+
+
+def _parse_porcelain_v2(
+    stdout: bytes,
+    modified: set[str],
+    added: set[str],
+    deleted: set[str],
+    prefix: bytes = b"",
+) -> None:
+    """Parse NUL-separated git status --porcelain=v2 output.
+
+    Record types: ``1`` ordinary change, ``2`` rename/copy (followed by an extra
+    entry holding the original path), ``u`` unmerged, ``?`` untracked. The XY
+    field carries the staged (X) and unstaged (Y) status letters. Paths are
+    recorded with *prefix* stripped; paths outside it are skipped.
+    """
+    strip = len(prefix)
+    entries = stdout.split(b"\0")
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        kind = entry[:1]
+
+        if kind == b"1":
+            fields = entry.split(b" ", 8)
+            if len(fields) < 9 or not fields[8].startswith(prefix):
+                continue
+            xy = fields[1].decode("ascii", "replace")
+            path = os.fsdecode(fields[8][strip:])
+            _apply_status_code(xy[0], path, modified, added, deleted)
+            _apply_status_code(xy[1], path, modified, added, deleted)
+        elif kind == b"2":
+            fields = entry.split(b" ", 9)
+            orig = entries[i] if i < len(entries) else b""
+            i += 1
+            if len(fields) < 10:
+                continue
+            xy = fields[1].decode("ascii", "replace")
+            inside = fields[9].startswith(prefix)
+            path = os.fsdecode(fields[9][strip:])
+            for code in xy:
+                if code == "R":
+                    # Rename: delete old path, add new path
+                    if orig and orig.startswith(prefix):
+                        deleted.add(os.fsdecode(orig[strip:]))
+                    if inside:
+                        added.add(path)
+                elif not inside:
+                    continue
+                elif code == "C":
+                    added.add(path)
+                else:
+                    _apply_status_code(code, path, modified, added, deleted)
+        elif kind == b"u":
+            fields = entry.split(b" ", 10)
+            if len(fields) == 11 and fields[10].startswith(prefix):
+                modified.add(os.fsdecode(fields[10][strip:]))
+        elif kind == b"?":
+            raw = entry[2:]
+            if raw.startswith(prefix) and len(raw) > strip:
+                added.add(os.fsdecode(raw[strip:]))
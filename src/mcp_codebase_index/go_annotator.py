@@ -20,9 +20,18 @@
 
 Handles common Go patterns: function/method declarations, struct/interface
 types, import statements, and doc comments using regex and brace counting.
+Captured identifiers and import paths are interned, since the same names
+repeat across every file of a project.
 """
 
+from __future__ import annotations
+
 import re
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from operator import add
+from sys import intern
 from typing import Optional
 
 from mcp_codebase_index.models import (
@@ -33,193 +42,112 @@ from mcp_codebase_index.models import (
     StructuralMetadata,
 )
 
+# Everything that matters when matching braces. Comments and string and rune
+# literals are consumed whole so braces inside them never count; interpreted
+# strings end at the end of their line at the latest, raw strings may span
+# lines, and an unterminated block comment or raw string runs to the end of the
+# file. Runes come first so '`', '"' and '{' never open a string or a block.
+_BRACE_TOKEN_RE = re.compile(
+    r"'(?:\\[^\n][^'\n]*|[^'\\\n])'"
+    r'|/\*.*?(?:\*/|\Z)'
+    r'|//[^\n]*'
+    r'|"(?:[^"\\\n]|\\[^\n]?)*"?'
+    r'|`[^`]*`?'
+    r'|[{}]',
+    re.DOTALL,
+)
 
-def _build_line_offsets(text: str, lines: list[str]) -> list[int]:
-    offsets: list[int] = []
-    pos = 0
-    for line in lines:
-        offsets.append(pos)
-        pos += len(line) + 1
-    return offsets
-
-
-def _strip_comments_and_strings(line: str) -> str:
-    """Remove string literals, raw strings, and comments for brace counting."""
-    result: list[str] = []
-    i = 0
-    in_backtick = False
-    while i < len(line):
-        ch = line[i]
-        if in_backtick:
-            if ch == '`':
-                in_backtick = False
-            i += 1
-            continue
-        if ch == '`':
-            in_backtick = True
-            i += 1
-            continue
-        if ch == '"':
-            i += 1
-            while i < len(line) and line[i] != '"':
-                if line[i] == '\\':
-                    i += 1
-                i += 1
-            i += 1  # skip closing "
-            continue
-        if ch == '/' and i + 1 < len(line):
-            if line[i + 1] == '/':
-                break  # rest is comment
-            if line[i + 1] == '*':
-                # block comment on single line (simplified)
-                end = line.find('*/', i + 2)
-                if end >= 0:
-                    i = end + 2
-                    continue
-                else:
-                    break  # rest is block comment start
-        result.append(ch)
-        i += 1
-    return ''.join(result)
-
-
-def _find_brace_end(lines: list[str], start_line_0: int) -> int:
-    """Find the 0-based line where the outermost brace closes, skipping strings/comments."""
+
+def _find_brace_end(source: str, line_starts: array[int], start_line_0: int) -> int:
+    """Find the 0-based line where the outermost brace closes, skipping strings/comments.
+
+    Scans tokens from the start of start_line_0 with a single compiled regex,
+    so only braces, comments and literals reach Python, never single characters.
+    """
     depth = 0
-    found_open = False
-    in_block_comment = False
-    for idx in range(start_line_0, len(lines)):
-        line = lines[idx]
-        i = 0
-        while i < len(line):
-            ch = line[i]
-            if in_block_comment:
-                if ch == '*' and i + 1 < len(line) and line[i + 1] == '/':
-                    in_block_comment = False
-                    i += 2
-                    continue
-                i += 1
-                continue
-            if ch == '/' and i + 1 < len(line):
-                if line[i + 1] == '/':
-                    break  # rest is line comment
-                if line[i + 1] == '*':
-                    in_block_comment = True
-                    i += 2
-                    continue
-            if ch == '"':
-                i += 1
-                while i < len(line) and line[i] != '"':
-                    if line[i] == '\\':
-                        i += 1
-                    i += 1
-                i += 1
-                continue
-            if ch == '`':
-                # raw string can span lines - scan to end
-                i += 1
-                while True:
-                    while i < len(line):
-                        if line[i] == '`':
-                            i += 1
-                            break
-                        i += 1
-                    else:
-                        # continue to next line
-                        idx += 1
-                        if idx >= len(lines):
-                            return len(lines) - 1
-                        line = lines[idx]
-                        i = 0
-                        continue
-                    break
-                continue
-            if ch == '{':
-                depth += 1
-                found_open = True
-            elif ch == '}':
-                depth -= 1
-                if found_open and depth == 0:
-                    return idx
-            i += 1
-    return len(lines) - 1
+    for m in _BRACE_TOKEN_RE.finditer(source, line_starts[start_line_0]):
+        tok = m.group()
+        if tok == '{':
+            depth += 1
+        elif tok == '}':
+            depth -= 1
+            if depth == 0:
+                return bisect_right(line_starts, m.start()) - 1
+    return len(line_starts) - 1
 
 
 # ---------------------------------------------------------------------------
 # Import detection
 # ---------------------------------------------------------------------------
 
-_SINGLE_IMPORT_RE = re.compile(
-    r'^\s*import\s+'
-    r'(?:(\w+)\s+)?'       # optional alias
-    r'"([^"]+)"'
+# A single-line import, or the opening of a grouped ``import (`` block.
+# ``[^\S\n]`` keeps every match on one line of the multi-line source.
+_IMPORT_RE = re.compile(
+    r'^[^\S\n]*import'
+    r'(?:[^\S\n]+(?:(\w+)[^\S\n]+)?"([^"\n]+)"'   # optional alias, path
+    r'|[^\S\n]*\()',
+    re.MULTILINE,
 )
 
-_IMPORT_GROUP_START_RE = re.compile(r'^\s*import\s*\(')
+# The line that closes a grouped import block.
+_IMPORT_GROUP_END_RE = re.compile(r'^[^\S\n]*\)[^\S\n]*$', re.MULTILINE)
 
 _IMPORT_LINE_RE = re.compile(
-    r'^\s*'
-    r'(?:(\.|_|\w+)\s+)?'   # optional alias (., _, or name)
-    r'"([^"]+)"'
+    r'^[^\S\n]*'
+    r'(?:(\.|_|\w+)[^\S\n]+)?'   # optional alias (., _, or name)
+    r'"([^"\n]+)"',
+    re.MULTILINE,
 )
 
 
-def _parse_imports(lines: list[str]) -> list[ImportInfo]:
+def _parse_imports(source: str, line_starts: array[int]) -> list[ImportInfo]:
+    """Collect imports with regex scans over the whole source.
+
+    Grouped blocks run from the line after ``import (`` up to the first line
+    that is just ``)``; lines inside a block are never treated as new imports.
+    """
     imports: list[ImportInfo] = []
-    i = 0
-    while i < len(lines):
-        stripped = lines[i].strip()
-
-        # Single-line import
-        m = _SINGLE_IMPORT_RE.match(stripped)
-        if m and '(' not in stripped.split('"')[0]:
-            alias = m.group(1)
-            module = m.group(2)
+    resume = 0
+    for m in _IMPORT_RE.finditer(source):
+        if m.start() < resume:
+            continue
+
+        module = m.group(2)
+        if module is not None:
+            # Single-line import
+            alias = m.group(1) and intern(m.group(1))
+            module = intern(module)
             # Extract short name from module path
-            short_name = module.rsplit('/', 1)[-1] if '/' in module else module
+            short_name = intern(module[module.rfind('/') + 1:])
             imports.append(ImportInfo(
                 module=module,
                 names=[short_name] if not alias else [],
                 alias=alias,
-                line_number=i + 1,
+                line_number=bisect_right(line_starts, m.start()),
                 is_from_import=False,
             ))
-            i += 1
-            continue
-
-        # Grouped import
-        if _IMPORT_GROUP_START_RE.match(stripped):
-            i += 1
-            while i < len(lines):
-                line = lines[i].strip()
-                if line == ')':
-                    i += 1
-                    break
-                im = _IMPORT_LINE_RE.match(line)
-                if im:
-                    alias = im.group(1)
-                    module = im.group(2)
-                    short_name = module.rsplit('/', 1)[-1] if '/' in module else module
-                    # dot import: alias='.'
-                    # blank import: alias='_'
-                    effective_alias: Optional[str] = None
-                    if alias and alias not in ('.', '_'):
-                        effective_alias = alias
-                    elif alias == '.':
-                        effective_alias = '.'
-                    elif alias == '_':
-                        effective_alias = '_'
-                    imports.append(ImportInfo(
-                        module=module,
-                        names=[short_name] if not effective_alias else [],
-                        alias=effective_alias,
-                        line_number=i + 1,
-                        is_from_import=False,
-                    ))
-                i += 1
             continue
 
-        i += 1
+        # Grouped import: the rest of the opening line is ignored
+        body_start = source.find('\n', m.end()) + 1
+        if not body_start:
+            break
+        end = _IMPORT_GROUP_END_RE.search(source, body_start)
+        body_end = end.start() if end else len(source)
+        resume = end.end() if end else len(source)
+        for im in _IMPORT_LINE_RE.finditer(source, body_start, body_end):
+            alias = im.group(1) and intern(im.group(1))
+            module = intern(im.group(2))
+            short_name = intern(module[module.rfind('/') + 1:])
+            # dot import: alias='.'
+            # blank import: alias='_'
+            imports.append(ImportInfo(
+                module=module,
+                names=[short_name] if not alias else [],
+                alias=alias,
+                line_number=bisect_right(line_starts, im.start()),
+                is_from_import=False,
+            ))
     return imports
 
 
@@ -242,31 +170,23 @@ _METHOD_RE = re.compile(
 )
 
 
+# First token of each comma-separated parameter that has at least two tokens
+# ("name type"); single-token parts are unnamed params and are skipped.
+_PARAM_HEAD_RE = re.compile(r'(?:^|,)\s*([^\s,]+)\s+[^\s,]')
+
+
 def _extract_params(raw: str) -> list[str]:
     """Extract parameter names from a Go parameter string."""
+    # Go params: "name type" or "name, name2 type" or just "type" (unnamed)
     params: list[str] = []
-    if not raw.strip():
-        return params
-    for part in raw.split(','):
-        part = part.strip()
-        if not part:
-            continue
-        # Go params: "name type" or "name, name2 type" or just "type" (unnamed)
-        # Handle variadic: "args ...int"
-        tokens = part.split()
-        if len(tokens) >= 2:
-            name = tokens[0]
-            if name == '...':
-                continue
-            # Check if the first token looks like a name (not a type)
-            if not name[0].isupper() and not name.startswith('*') and not name.startswith('[]') and not name.startswith('...'):
-                params.append(name)
-            elif name.startswith('...'):
-                params.append(name.lstrip('.'))
-        elif len(tokens) == 1:
-            # Could be just a type (unnamed param) or a name
-            # In Go, unnamed params are common in interfaces, skip them
-            pass
+    for name in _PARAM_HEAD_RE.findall(raw):
+        if name.startswith('...'):
+            # Variadic: "...args T"
+            if name != '...':
+                params.append(intern(name.lstrip('.')))
+        elif not name[0].isupper() and not name.startswith(('*', '[]')):
+            # The first token looks like a name, not a type
+            params.append(intern(name))
     return params
 
 
@@ -274,18 +194,19 @@ def _extract_params(raw: str) -> list[str]:
 # Doc comment collection
 # ---------------------------------------------------------------------------
 
-def _collect_doc_comment(lines: list[str], decl_line_0: int) -> Optional[str]:
+def _collect_doc_comment(stripped_lines: list[str], decl_line_0: int) -> Optional[str]:
     """Collect consecutive // comment lines immediately before decl_line_0."""
     doc_lines: list[str] = []
     j = decl_line_0 - 1
     while j >= 0:
-        stripped = lines[j].strip()
+        stripped = stripped_lines[j]
         if stripped.startswith('//'):
-            doc_lines.insert(0, stripped[2:].strip())
+            doc_lines.append(stripped[2:].strip())
             j -= 1
         else:
             break
-    return '\n'.join(doc_lines) if doc_lines else None
+    # Collected bottom-up; restore source order.
+    return '\n'.join(reversed(doc_lines)) if doc_lines else None
 
 
 # ---------------------------------------------------------------------------
@@ -296,41 +217,49 @@ _STRUCT_RE = re.compile(r'^\s*type\s+(\w+)\s+struct\s*\{?')
 _INTERFACE_RE = re.compile(r'^\s*type\s+(\w+)\s+interface\s*\{?')
 _TYPE_ALIAS_RE = re.compile(r'^\s*type\s+(\w+)\s*=\s*(\w+)')
 
+# Method signature inside an interface body: Name(params) returnType
+_IFACE_METHOD_RE = re.compile(r'(\w+)\s*\(([^)]*)\)')
+
+# Lines that can open a top-level declaration, plus import lines so that
+# grouped import blocks can be skipped.
+_DECL_START_RE = re.compile(r'^[^\S\n]*(func\b|type\b|import)', re.MULTILINE)
+
+
+# A body line holding a single token, possibly pointer-prefixed: an embedded
+# type. Fields have the "name type" pattern and never match.
+_EMBEDDED_RE = re.compile(r'^[^\S\n]*\**(\S+)[^\S\n]*$', re.MULTILINE)
+
 
-def _extract_embedded_types(lines: list[str], start_0: int, end_0: int) -> list[str]:
+def _extract_embedded_types(
+    source: str, line_starts: array[int], start_0: int, end_0: int
+) -> list[str]:
     """Extract embedded type names from a struct or interface body."""
-    bases: list[str] = []
-    for idx in range(start_0 + 1, end_0):
-        stripped = lines[idx].strip()
-        if not stripped or stripped.startswith('//') or stripped == '}':
-            continue
-        # Embedded types: just a type name on its own line (possibly with *)
-        # Fields have "name type" pattern, embedded types are a single token
-        tokens = stripped.split()
-        if len(tokens) == 1:
-            name = tokens[0].lstrip('*')
-            if name and name[0].isupper():
-                bases.append(name)
-    return bases
+    if end_0 <= start_0 + 1:
+        return []
+    # Scan the body lines in place rather than re-joining them.
+    names = _EMBEDDED_RE.findall(source, line_starts[start_0 + 1], line_starts[end_0])
+    return [intern(name) for name in names if name[0].isupper()]
 
 
-def _extract_interface_methods(lines: list[str], start_0: int, end_0: int) -> list[FunctionInfo]:
+def _extract_interface_methods(
+    stripped_lines: list[str], start_0: int, end_0: int
+) -> list[FunctionInfo]:
     """Extract method signatures from an interface body."""
     methods: list[FunctionInfo] = []
     iface_name = ''
     # Get interface name from start line
-    m = _INTERFACE_RE.match(lines[start_0].strip())
+    m = _INTERFACE_RE.match(stripped_lines[start_0])
     if m:
-        iface_name = m.group(1)
+        iface_name = intern(m.group(1))
 
     for idx in range(start_0 + 1, end_0):
-        stripped = lines[idx].strip()
+        stripped = stripped_lines[idx]
         if not stripped or stripped.startswith('//') or stripped == '}':
             continue
         # Method sig: Name(params) returnType
-        mm = re.match(r'(\w+)\s*\(([^)]*)\)', stripped)
+        mm = _IFACE_METHOD_RE.match(stripped)
         if mm:
-            name = mm.group(1)
+            name = intern(mm.group(1))
             params = _extract_params(mm.group(2))
             methods.append(FunctionInfo(
                 name=name,
@@ -364,47 +293,53 @@ def annotate_go(source: str, source_name: str = "<source>") -> StructuralMetadat
     lines = source.split("\n")
     total_lines = len(lines)
     total_chars = len(source)
-    line_offsets = _build_line_offsets(source, lines)
+    # Start offset of each line, for mapping brace positions back to lines.
+    line_starts = array(
+        'q', map(add, accumulate(map(len, lines), initial=0), range(total_lines))
+    )
+
+    # Every helper works on stripped lines; strip each line once, up front.
+    stripped_lines = [line.strip() for line in lines]
 
-    imports = _parse_imports(lines)
+    imports = _parse_imports(source, line_starts)
 
     functions: list[FunctionInfo] = []
     classes: list[ClassInfo] = []
 
-    # Track consumed line ranges to avoid duplicate detection
-    consumed: set[int] = set()
+    # Track consumed line ranges to avoid duplicate detection (one flag per line)
+    consumed = bytearray(total_lines)
 
-    i = 0
-    while i < total_lines:
-        if i in consumed:
-            i += 1
+    # Every declaration this annotator recognises starts its line with `func`
+    # or `type`; find those lines in one pass instead of testing each line.
+    for decl in _DECL_START_RE.finditer(source):
+        i = bisect_right(line_starts, decl.start()) - 1
+        if consumed[i]:
             continue
 
-        stripped = lines[i].strip()
-
-        # Skip empty lines and comments
-        if not stripped or stripped.startswith('//') or stripped.startswith('/*'):
-            i += 1
-            continue
+        stripped = stripped_lines[i]
+        keyword = decl.group(1)
 
         # Skip import blocks (already parsed)
-        if stripped.startswith('import'):
+        if keyword == 'import':
             if '(' in stripped:
-                while i < total_lines and ')' not in lines[i]:
-                    i += 1
-            i += 1
+                end_0 = i
+                while end_0 < total_lines - 1 and ')' not in lines[end_0]:
+                    end_0 += 1
+                consumed[i:end_0 + 1] = b'\x01' * (end_0 + 1 - i)
             continue
 
+        is_func = keyword == 'func'
+
         # Method declaration (check before function - more specific pattern)
-        mm = _METHOD_RE.match(stripped)
+        mm = _METHOD_RE.match(stripped) if is_func else None
         if mm:
-            receiver_type = mm.group(2)
-            method_name = mm.group(3)
+            receiver_type = intern(mm.group(2))
+            method_name = intern(mm.group(3))
             params = _extract_params(mm.group(5))
-            docstring = _collect_doc_comment(lines, i)
+            docstring = _collect_doc_comment(stripped_lines, i)
 
-            if '{' in stripped or (i + 1 < total_lines and '{' in lines[i + 1].strip()):
-                end_0 = _find_brace_end(lines, i)
+            if '{' in stripped or (i + 1 < total_lines and '{' in stripped_lines[i + 1]):
+                end_0 = _find_brace_end(source, line_starts, i)
             else:
                 end_0 = i
 
@@ -420,20 +355,18 @@ def annotate_go(source: str, source_name: str = "<source>") -> StructuralMetadat
             )
             functions.append(func_info)
 
-            for j in range(i, end_0 + 1):
-                consumed.add(j)
-            i = end_0 + 1
+            consumed[i:end_0 + 1] = b'\x01' * (end_0 + 1 - i)
             continue
 
         # Function declaration
-        fm = _FUNC_RE.match(stripped)
-        if fm and not stripped.startswith('type'):
-            name = fm.group(1)
+        fm = _FUNC_RE.match(stripped) if is_func else None
+        if fm:
+            name = intern(fm.group(1))
             params = _extract_params(fm.group(3))
-            docstring = _collect_doc_comment(lines, i)
+            docstring = _collect_doc_comment(stripped_lines, i)
 
-            if '{' in stripped or (i + 1 < total_lines and '{' in lines[i + 1].strip()):
-                end_0 = _find_brace_end(lines, i)
+            if '{' in stripped or (i + 1 < total_lines and '{' in stripped_lines[i + 1]):
+                end_0 = _find_brace_end(source, line_starts, i)
             else:
                 end_0 = i
 
@@ -449,19 +382,20 @@ def annotate_go(source: str, source_name: str = "<source>") -> StructuralMetadat
             )
             functions.append(func_info)
 
-            for j in range(i, end_0 + 1):
-                consumed.add(j)
-            i = end_0 + 1
+            consumed[i:end_0 + 1] = b'\x01' * (end_0 + 1 - i)
+            continue
+
+        if is_func:
             continue
 
         # Struct type
         sm = _STRUCT_RE.match(stripped)
         if sm:
-            name = sm.group(1)
-            docstring = _collect_doc_comment(lines, i)
-            if '{' in stripped or (i + 1 < total_lines and '{' in lines[i + 1].strip()):
-                end_0 = _find_brace_end(lines, i)
-                bases = _extract_embedded_types(lines, i, end_0)
+            name = intern(sm.group(1))
+            docstring = _collect_doc_comment(stripped_lines, i)
+            if '{' in stripped or (i + 1 < total_lines and '{' in stripped_lines[i + 1]):
+                end_0 = _find_brace_end(source, line_starts, i)
+                bases = _extract_embedded_types(source, line_starts, i, end_0)
             else:
                 end_0 = i
                 bases = []
@@ -475,20 +409,18 @@ def annotate_go(source: str, source_name: str = "<source>") -> StructuralMetadat
                 docstring=docstring,
             ))
 
-            for j in range(i, end_0 + 1):
-                consumed.add(j)
-            i = end_0 + 1
+            consumed[i:end_0 + 1] = b'\x01' * (end_0 + 1 - i)
             continue
 
         # Interface type
         im = _INTERFACE_RE.match(stripped)
         if im:
-            name = im.group(1)
-            docstring = _collect_doc_comment(lines, i)
-            if '{' in stripped or (i + 1 < total_lines and '{' in lines[i + 1].strip()):
-                end_0 = _find_brace_end(lines, i)
-                bases = _extract_embedded_types(lines, i, end_0)
-                iface_methods = _extract_interface_methods(lines, i, end_0)
+            name = intern(im.group(1))
+            docstring = _collect_doc_comment(stripped_lines, i)
+            if '{' in stripped or (i + 1 < total_lines and '{' in stripped_lines[i + 1]):
+                end_0 = _find_brace_end(source, line_starts, i)
+                bases = _extract_embedded_types(source, line_starts, i, end_0)
+                iface_methods = _extract_interface_methods(stripped_lines, i, end_0)
             else:
                 end_0 = i
                 bases = []
@@ -504,17 +436,15 @@ def annotate_go(source: str, source_name: str = "<source>") -> StructuralMetadat
             ))
             functions.extend(iface_methods)
 
-            for j in range(i, end_0 + 1):
-                consumed.add(j)
-            i = end_0 + 1
+            consumed[i:end_0 + 1] = b'\x01' * (end_0 + 1 - i)
             continue
 
         # Type alias
         ta = _TYPE_ALIAS_RE.match(stripped)
         if ta:
-            name = ta.group(1)
-            alias_target = ta.group(2)
-            docstring = _collect_doc_comment(lines, i)
+            name = intern(ta.group(1))
+            alias_target = intern(ta.group(2))
+            docstring = _collect_doc_comment(stripped_lines, i)
 
             classes.append(ClassInfo(
                 name=name,
@@ -524,11 +454,7 @@ def annotate_go(source: str, source_name: str = "<source>") -> StructuralMetadat
                 decorators=[],
                 docstring=docstring,
             ))
-            consumed.add(i)
-            i += 1
-            continue
-
-        i += 1
+            consumed[i] = 1
 
     # Attach methods to their parent struct classes
     method_map: dict[str, list[FunctionInfo]] = {}
@@ -536,28 +462,19 @@ def annotate_go(source: str, source_name: str = "<source>") -> StructuralMetadat
         if f.is_method and f.parent_class:
             method_map.setdefault(f.parent_class, []).append(f)
 
-    updated_classes: list[ClassInfo] = []
     for cls in classes:
         if cls.name in method_map and not cls.methods:
-            # struct with methods defined via receivers
-            updated_classes.append(ClassInfo(
-                name=cls.name,
-                line_range=cls.line_range,
-                base_classes=cls.base_classes,
-                methods=cls.methods + method_map[cls.name],
-                decorators=cls.decorators,
-                docstring=cls.docstring,
-            ))
-        else:
-            updated_classes.append(cls)
+            # struct with methods defined via receivers; ClassInfo is frozen but
+            # its methods list is private to it, so fill that in place
+            cls.methods.extend(method_map[cls.name])
 
     return StructuralMetadata(
         source_name=source_name,
         total_lines=total_lines,
         total_chars=total_chars,
         lines=lines,
-        line_char_offsets=line_offsets,
+        line_char_offsets=line_starts,
         functions=functions,
-        classes=updated_classes,
+        classes=classes,
         imports=imports,
     )
@@ -37,16 +37,6 @@ _MAX_DEPTH = 4
 _DISTINGUISHING_FIELDS = ("name", "id", "type")
 
 
-def _build_line_offsets(lines: list[str]) -> list[int]:
-    """Compute character offset of each line start."""
-    offsets: list[int] = []
-    pos = 0
-    for line in lines:
-        offsets.append(pos)
-        pos += len(line) + 1
-    return offsets
-
-
 def _find_key_line(lines: list[str], key: str, start_from: int = 0) -> int:
     """Find the 1-indexed line number where a JSON key appears.
 
@@ -155,7 +145,6 @@ def annotate_json(text: str, source_name: str = "<json>") -> StructuralMetadata:
     lines = text.split("\n")
     total_lines = len(lines)
     total_chars = len(text)
-    line_offsets = _build_line_offsets(lines)
 
     sections: list[SectionInfo] = []
     imports: list[ImportInfo] = []
@@ -167,7 +156,6 @@ def annotate_json(text: str, source_name: str = "<json>") -> StructuralMetadata:
         total_lines=total_lines,
         total_chars=total_chars,
         lines=lines,
-        line_char_offsets=line_offsets,
         sections=sections,
         imports=imports,
     )
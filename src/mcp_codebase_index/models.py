@@ -18,10 +18,16 @@
 
 """Structural metadata models for codebase indexing."""
 
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
 from dataclasses import dataclass, field
+from itertools import accumulate
+from operator import add
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LineRange:
     """A range of lines (1-indexed, inclusive on both ends)."""
 
@@ -29,7 +35,7 @@ class LineRange:
     end: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FunctionInfo:
     """Metadata about a function or method."""
 
@@ -43,7 +49,7 @@ class FunctionInfo:
     parent_class: str | None  # None for top-level functions
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ClassInfo:
     """Metadata about a class."""
 
@@ -55,7 +61,7 @@ class ClassInfo:
     docstring: str | None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ImportInfo:
     """Metadata about an import statement."""
 
@@ -66,7 +72,7 @@ class ImportInfo:
     is_from_import: bool  # True for "from X import Y", False for "import X"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SectionInfo:
     """Metadata about a section in a text document."""
 
@@ -75,6 +81,37 @@ class SectionInfo:
     line_range: LineRange
 
 
+class _LazyLineOffsets:
+    """Field descriptor that derives line start offsets from ``lines`` on first use.
+
+    Nothing on the indexing path reads the offsets, so annotators may leave them
+    out and the array is only built (then cached on the instance) when asked for.
+    Offsets are held as a packed ``array('q')`` (8 bytes each) rather than a list
+    of int objects; supplied sequences are converted on assignment.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._attr = f"_{name}"
+
+    def __get__(self, obj: object, objtype: type | None = None) -> array[int] | None:
+        if obj is None:
+            return None  # dataclass default: compute on demand
+        offsets: array[int] | None = obj.__dict__.get(self._attr)
+        if offsets is None:
+            lines = obj.lines  # type: ignore[attr-defined]
+            # Line i starts after all earlier lines plus one newline each.
+            offsets = array(
+                "q", map(add, accumulate(map(len, lines), initial=0), range(len(lines)))
+            )
+            obj.__dict__[self._attr] = offsets
+        return offsets
+
+    def __set__(self, obj: object, value: Iterable[int] | None) -> None:
+        if value is not None and not isinstance(value, array):
+            value = array("q", value)
+        obj.__dict__[self._attr] = value
+
+
 @dataclass
 class StructuralMetadata:
     """Complete structural metadata for a single file or text document."""
@@ -86,7 +123,8 @@ class StructuralMetadata:
 
     # Line data (always populated)
     lines: list[str]  # All lines (0-indexed internally, but API uses 1-indexed)
-    line_char_offsets: list[int]  # Character offset of each line start
+    # Character offset of each line start (derived from lines when not supplied)
+    line_char_offsets: array[int] = _LazyLineOffsets()  # type: ignore[assignment]
 
     # Code structure (populated for code files)
     functions: list[FunctionInfo] = field(default_factory=list)
@@ -101,7 +139,7 @@ class StructuralMetadata:
     dependency_graph: dict[str, list[str]] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProjectIndex:
     """Structural index for an entire codebase."""
 
@@ -125,6 +163,7 @@ class ProjectIndex:
     total_functions: int = 0
     total_classes: int = 0
     index_build_time_seconds: float = 0.0
+    # Measured at index() time when asked for (index(compute_memory=True)), else 0
     index_memory_bytes: int = 0
 
     # Git tracking
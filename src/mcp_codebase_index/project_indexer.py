@@ -28,13 +28,298 @@ import os
 import re
 import sys
 import time
-from pathlib import Path
-
+import types
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import accumulate, islice
+from operator import add
+
+from mcp_codebase_index.annotation_cache import AnnotationCache
 from mcp_codebase_index.annotator import annotate
+from mcp_codebase_index.git_tracker import get_head_commit, is_git_repo
 from mcp_codebase_index.models import ProjectIndex, StructuralMetadata
 
 logger = logging.getLogger(__name__)
 
+# Below this many files, starting worker processes costs more than it saves.
+_PARALLEL_MIN_FILES = 64
+
+# How many files the serial path's reader thread may read ahead of annotation.
+_PREFETCH_DEPTH = 8
+
+
+def _gil_disabled() -> bool:
+    """True on a free-threaded build (3.13t+) running with the GIL turned off."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def _compile_fnmatch(patterns: list[str]) -> re.Pattern[str] | None:
+    """Combine fnmatch patterns into one regex; None when there are none."""
+    if not patterns:
+        return None
+    # fnmatch.fnmatch folds case where the OS does (Windows); keep that.
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns), flags)
+
+
+def _glob_segments(pattern: str) -> list[re.Pattern[str] | None]:
+    """Compile a Path.glob pattern into one matcher per path segment (None for ``**``)."""
+    return [
+        None if seg == "**" else re.compile(fnmatch.translate(seg))
+        for seg in pattern.split("/")
+    ]
+
+
+def _glob_match(segments: list[re.Pattern[str] | None], parts: list[str]) -> bool:
+    """Match relative path parts against compiled glob segments like Path.glob does."""
+    if not segments:
+        return not parts
+    head = segments[0]
+    if head is None:
+        if len(segments) == 1:
+            return False  # a trailing ** selects directories, never files
+        # ** spans zero or more directories
+        return any(_glob_match(segments[1:], parts[k:]) for k in range(len(parts)))
+    return bool(parts) and head.match(parts[0]) is not None and _glob_match(segments[1:], parts[1:])
+
+
+@dataclass
+class _ImportLookup:
+    """Lookup tables for resolving imports against one set of project files."""
+
+    files: set[str]
+    # Directory (with "/" separators) -> a .go file in it, for Go package imports
+    go_dirs: dict[str, str]
+    # Python module path with "/" separators -> the file it resolves to
+    py_modules: dict[str, str]
+
+
+# Where Python modules are looked for, in priority order.
+_PY_SEARCH_PREFIXES = ("", "src/", "lib/")
+
+
+def _build_import_lookup(files: Iterable[str]) -> _ImportLookup:
+    file_set = set(files)
+    go_dirs: dict[str, str] = {}
+    py_modules: dict[str, str] = {}
+    # Same priority as probing each prefix in turn, module.py before
+    # module/__init__.py: a lower (prefix, kind) rank wins.
+    py_ranks: dict[str, tuple[int, int]] = {}
+    for f in file_set:
+        if f.endswith(".go"):
+            go_dirs.setdefault(os.path.dirname(f).replace(os.sep, "/"), f)
+        elif f.endswith(".py"):
+            for prefix_rank, prefix in enumerate(_PY_SEARCH_PREFIXES):
+                if not f.startswith(prefix):
+                    continue
+                rest = f[len(prefix):]
+                candidates = [(rest[:-3], 0)]
+                if rest.endswith("/__init__.py"):
+                    candidates.append((rest[:-12], 1))
+                for module, kind in candidates:
+                    rank = (prefix_rank, kind)
+                    if rank < py_ranks.get(module, (len(_PY_SEARCH_PREFIXES), 0)):
+                        py_ranks[module] = rank
+                        py_modules[module] = f
+    return _ImportLookup(files=file_set, go_dirs=go_dirs, py_modules=py_modules)
+
+
+_WORD_RE = re.compile(r"\w+")
+
+# Up to this many names, one str.find per name rules a body out faster than the
+# alternation regex can; past it the single regex pass is cheaper.
+_PREFILTER_MAX_NAMES = 32
+
+_NameScan = tuple[tuple[str, ...] | None, re.Pattern[str] | None, list[str]]
+
+
+def _compile_name_scan(names: Iterable[str]) -> _NameScan:
+    """Prepare a one-pass scan for whole-word references to any of names.
+
+    Plain identifiers share one alternation regex: a \\b-bounded identifier match
+    is a whole word, so matches can never overlap and findall sees every name
+    present. Names with other characters keep an individual search each. For
+    short name lists a plain substring check first skips bodies that mention
+    none of them.
+    """
+    words: list[str] = []
+    others: list[str] = []
+    for name in names:
+        (words if _WORD_RE.fullmatch(name) else others).append(name)
+    needles = tuple(words + others) if len(words) + len(others) <= _PREFILTER_MAX_NAMES else None
+    if not words:
+        return needles, None, others
+    return needles, re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")\b"), others
+
+
+def _scan_names(scan: _NameScan, text: str, pos: int, endpos: int) -> set[str]:
+    """Names from a _compile_name_scan() scan that occur as whole words in text[pos:endpos]."""
+    needles, name_re, others = scan
+    if needles is not None and not any(text.find(n, pos, endpos) >= 0 for n in needles):
+        return set()
+    found = set(name_re.findall(text, pos, endpos)) if name_re is not None else set()
+    for name in others:
+        if re.compile(r"\b" + re.escape(name) + r"\b").search(text, pos, endpos):
+            found.add(name)
+    return found
+
+
+# Objects _deep_sizeof() counts but does not look inside.
+_SIZEOF_LEAVES = (str, bytes, bytearray, int, float, complex, bool, type(None), range)
+_SIZEOF_SKIP = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+
+
+def _deep_sizeof(root: object) -> int:
+    """Bytes held by root and everything reachable from it, each object counted once.
+
+    Follows dict, list, tuple and set contents, instance __dict__s and
+    __slots__. Classes, modules and functions are neither counted nor entered,
+    so shared definitions don't inflate the total.
+    """
+    seen: set[int] = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SIZEOF_SKIP):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, _SIZEOF_LEAVES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            instance_dict = getattr(obj, "__dict__", None)
+            if instance_dict is not None:
+                stack.append(instance_dict)
+            for cls in type(obj).__mro__:
+                for slot in cls.__dict__.get("__slots__", ()):
+                    if slot not in ("__dict__", "__weakref__") and hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return total
+
+
+def _read_bytes(abs_path: str) -> bytes:
+    """Read a whole file with os.open/os.read, bypassing the buffered IO stack.
+
+    The size from fstat lets a regular file come back in one read; files that
+    report no size (or are short-read) fall back to reading until EOF.
+    """
+    fd = os.open(abs_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size) if size > 0 else b""
+        if len(data) < size or size == 0:
+            chunks = [data]
+            while chunk := os.read(fd, 1 << 16):
+                chunks.append(chunk)
+            data = b"".join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
+def _decode_source(data: bytes) -> str:
+    """Decode file bytes as text, trying UTF-8 first then latin-1 as fallback."""
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        text = data.decode("latin-1")
+    # Match text-mode universal newline translation.
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_source(abs_path: str) -> str:
+    """Read a file as text, trying UTF-8 first then latin-1 as fallback."""
+    return _decode_source(_read_bytes(abs_path))
+
+
+def _annotate_file(
+    job: tuple[str, str, str | None],
+) -> tuple[str, StructuralMetadata | None, str | None]:
+    """Read and annotate one file. Runs in worker processes, so it must stay module-level.
+
+    Returns (rel_path, metadata, error); metadata is None when the file could not be read.
+    """
+    abs_path, rel_path, cache_dir = job
+    if cache_dir:
+        # The cache skips the read when the file's stat is unchanged, and
+        # otherwise hashes the raw bytes; it only decodes on a miss.
+        cache = AnnotationCache(cache_dir)
+        try:
+            metadata = cache.annotate_file(abs_path, rel_path, _read_bytes, _decode_source)
+        except OSError as e:
+            return rel_path, None, str(e)
+        return rel_path, metadata, None
+
+    try:
+        data = _read_bytes(abs_path)
+    except OSError as e:
+        return rel_path, None, str(e)
+    return _annotate_data(rel_path, data)
+
+
+def _annotate_data(
+    rel_path: str, data: bytes
+) -> tuple[str, StructuralMetadata | None, str | None]:
+    """Decode and annotate one file's bytes; same result shape as _annotate_file()."""
+    try:
+        source = _decode_source(data)
+    except UnicodeDecodeError as e:
+        return rel_path, None, str(e)
+    return rel_path, annotate(source, source_name=rel_path), None
+
+
+def _annotate_prefetched(
+    jobs: list[tuple[str, str, str | None]],
+) -> list[tuple[str, StructuralMetadata | None, str | None]]:
+    """Annotate jobs in order on this thread while a reader thread reads ahead.
+
+    Reads release the GIL, so up to _PREFETCH_DEPTH files load from disk while
+    the current one is being annotated instead of each read stalling the loop.
+    Only for uncached jobs: the annotation cache may not need to read at all.
+    """
+    results: list[tuple[str, StructuralMetadata | None, str | None]] = []
+    job_iter = iter(jobs)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as reader:
+        pending = deque(
+            (rel_path, reader.submit(_read_bytes, abs_path))
+            for abs_path, rel_path, _ in islice(job_iter, _PREFETCH_DEPTH)
+        )
+        while pending:
+            rel_path, future = pending.popleft()
+            for abs_path, next_rel_path, _ in islice(job_iter, 1):
+                pending.append((next_rel_path, reader.submit(_read_bytes, abs_path)))
+            try:
+                data = future.result()
+            except OSError as e:
+                results.append((rel_path, None, str(e)))
+                continue
+            results.append(_annotate_data(rel_path, data))
+    return results
+
+
+def _describes_source(metadata: StructuralMetadata, source: str) -> bool:
+    """True if annotating *source* again would give *metadata* back.
+
+    Conservative: it checks that the stored lines, joined, are *source*, allowing
+    the one trailing newline some annotators drop from their lines. Sources
+    whose line endings an annotator rewrote (e.g. CRLF) never match.
+    """
+    if metadata.total_chars != len(source):
+        return False
+    joined = "\n".join(metadata.lines)
+    return source == joined or (source[-1:] == "\n" and source[:-1] == joined)
+
 
 class ProjectIndexer:
     """Indexes an entire codebase for structural navigation."""
@@ -45,8 +330,12 @@ class ProjectIndexer:
         include_patterns: list[str] | None = None,
         exclude_patterns: list[str] | None = None,
         max_file_size_bytes: int = 500_000,
+        cache_dir: str | None = None,
+        max_workers: int | None = None,
     ):
         self.root_path = os.path.abspath(root_path)
+        # Paths under root_path start with this; see _relpath().
+        self._root_prefix = self.root_path.rstrip(os.sep) + os.sep
         self.include_patterns = include_patterns or [
             "**/*.py",
             "**/*.ts",
@@ -73,20 +362,61 @@ class ProjectIndexer:
             "**/.package-lock.json",
             "**/composer.lock",
         ]
+
+        # Compile the patterns once; discovery and _is_excluded run per path.
+        # "**/<name glob>" includes only look at the file name, so they share one
+        # regex; other includes are matched segment by segment.
+        name_globs: list[str] = []
+        self._include_path_globs: list[list[re.Pattern[str] | None]] = []
+        for pattern in self.include_patterns:
+            head, _, tail = pattern.rpartition("/")
+            if head == "**" and tail != "**":
+                name_globs.append(tail)
+            else:
+                self._include_path_globs.append(_glob_segments(pattern))
+        self._include_name_re = _compile_fnmatch(name_globs)
+        self._exclude_re = _compile_fnmatch(self.exclude_patterns)
+        # Path components excluded outright, e.g. "node_modules" from "**/node_modules/**"
+        self._exclude_names = frozenset(
+            pattern.replace("**/", "").replace("/**", "").strip("/")
+            for pattern in self.exclude_patterns
+        )
+        # Patterns ending in "*" that exclude everything below a directory once
+        # they match "<dir>/"
+        self._exclude_dir_re = _compile_fnmatch(
+            [p for p in self.exclude_patterns if p.endswith("*")]
+        )
         self.max_file_size_bytes = max_file_size_bytes
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self._annotation_cache = AnnotationCache(cache_dir) if cache_dir else None
         self._project_index: ProjectIndex | None = None
+        # Built on first import resolution; reset whenever the set of files changes.
+        self._import_lookup_cache: _ImportLookup | None = None
+        # Each file's share of the global dependency graph, and which files
+        # contribute to each key, so reindex_file can patch a single file's edges.
+        self._file_dep_edges: dict[str, dict[str, set[str]]] = {}
+        self._dep_key_files: dict[str, list[str]] = {}
+        # Set until a full build fills the per-file edges above, and again when
+        # files change without a dependency-graph update (batched reindexing,
+        # removals, or an index assigned from a cache); the next update must
+        # then be a full rebuild.
+        self._dep_edges_stale = True
+        self._is_git_repo: bool | None = None
+        self._head_commit: str | None = None
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
-    def index(self) -> ProjectIndex:
+    def index(self, compute_memory: bool = False) -> ProjectIndex:
         """Walk the project, annotate all files, build cross-file graphs.
 
         Steps:
-        1. Discover files using pathlib.Path.glob matching include patterns,
-           filtering out exclude patterns
-        2. Read and annotate each file using the dispatch annotator
+        1. Discover files with one os.scandir walk matching include patterns,
+           pruning excluded directories and filtering out exclude patterns
+        2. Read and annotate each file using the dispatch annotator, spread
+           across a worker pool
         3. Build global symbol table: for each file's functions and classes,
            map qualified_name -> file_path
         4. Build cross-file import graph: for each file's imports, resolve to
@@ -97,6 +427,11 @@ class ProjectIndexer:
         7. Build reverse dependency graph
         8. Record timing and stats
 
+        Args:
+            compute_memory: Walk the finished index to fill in
+                index_memory_bytes. Off by default since the walk visits every
+                object the index holds; otherwise the field is left at 0.
+
         Returns:
             ProjectIndex with all files indexed and cross-references built.
         """
@@ -108,28 +443,25 @@ class ProjectIndexer:
 
         # Step 2: annotate each file
         files: dict[str, StructuralMetadata] = {}
-        total_lines = 0
-        total_functions = 0
-        total_classes = 0
 
-        for fpath in file_paths:
-            rel_path = os.path.relpath(fpath, self.root_path)
-            try:
-                source = self._read_file(fpath)
-            except (OSError, UnicodeDecodeError) as e:
-                logger.warning("Skipping %s: %s", rel_path, e)
+        jobs = [
+            (fpath, self._relpath(fpath), self.cache_dir)
+            for fpath in file_paths
+        ]
+        for rel_path, metadata, error in self._annotate_all(jobs):
+            if metadata is None:
+                logger.warning("Skipping %s: %s", rel_path, error)
                 continue
-
-            metadata = annotate(source, source_name=rel_path)
-            files[rel_path] = metadata
-            total_lines += metadata.total_lines
-            total_functions += len(metadata.functions)
-            total_classes += len(metadata.classes)
+            files[sys.intern(rel_path)] = metadata
+        total_lines = sum(m.total_lines for m in files.values())
+        total_functions = sum(len(m.functions) for m in files.values())
+        total_classes = sum(len(m.classes) for m in files.values())
 
         # Step 3: build global symbol table
         symbol_table = self._build_symbol_table(files)
 
         # Step 4: build cross-file import graph
+        self._import_lookup_cache = None
         import_graph = self._build_import_graph(files)
 
         # Step 5: build reverse import graph
@@ -156,8 +488,9 @@ class ProjectIndexer:
             total_functions=total_functions,
             total_classes=total_classes,
             index_build_time_seconds=elapsed,
-            index_memory_bytes=sys.getsizeof(files),  # rough estimate
         )
+        if compute_memory:
+            self._project_index.index_memory_bytes = _deep_sizeof(self._project_index)
 
         logger.info(
             "Indexed %d files (%d lines, %d functions, %d classes) in %.2fs",
@@ -183,35 +516,35 @@ class ProjectIndexer:
             raise RuntimeError("Cannot reindex before initial index() call.")
 
         # Normalize to relative path
-        abs_path = (
-            os.path.abspath(file_path)
-            if os.path.isabs(file_path)
-            else os.path.join(self.root_path, file_path)
-        )
-        rel_path = os.path.relpath(abs_path, self.root_path)
+        abs_path = os.path.abspath(os.path.join(self.root_path, file_path))
+        rel_path = sys.intern(self._relpath(abs_path))
 
         idx = self._project_index
 
         # Remove old data for this file
         old_metadata = idx.files.get(rel_path)
+        old_imports = idx.import_graph.get(rel_path, set()) if old_metadata is not None else set()
+        # Symbols dropped from / added to the table; other files' dependency
+        # edges only change when the set of known symbols does
+        removed_symbols: set[str] = set()
+        added_symbols: set[str] = set()
         if old_metadata is not None:
             # Remove old symbols from symbol table
             for func in old_metadata.functions:
                 if idx.symbol_table.get(func.qualified_name) == rel_path:
                     del idx.symbol_table[func.qualified_name]
+                    removed_symbols.add(func.qualified_name)
                 if idx.symbol_table.get(func.name) == rel_path:
                     del idx.symbol_table[func.name]
+                    removed_symbols.add(func.name)
             for cls in old_metadata.classes:
                 if idx.symbol_table.get(cls.name) == rel_path:
                     del idx.symbol_table[cls.name]
+                    removed_symbols.add(cls.name)
 
-            # Remove old entries from import graphs
+            # Remove old entry from the import graph; the reverse graph is
+            # patched below once the new imports are known
             idx.import_graph.pop(rel_path, None)
-            for targets in idx.reverse_import_graph.values():
-                targets.discard(rel_path)
-            # Clean up reverse import graph entries pointing from this file
-            for target_file in list(idx.reverse_import_graph.keys()):
-                idx.reverse_import_graph[target_file].discard(rel_path)
 
             # Update stats
             idx.total_lines -= old_metadata.total_lines
@@ -223,12 +556,21 @@ class ProjectIndexer:
             source = self._read_file(abs_path)
         except (OSError, UnicodeDecodeError) as e:
             logger.warning("Cannot reindex %s: %s", rel_path, e)
+            self._update_reverse_edges(idx.reverse_import_graph, rel_path, old_imports, set())
+            self._dep_edges_stale = True
             if rel_path in idx.files:
                 del idx.files[rel_path]
                 idx.total_files = len(idx.files)
+                self._import_lookup_cache = None
             return
 
-        metadata = annotate(source, source_name=rel_path)
+        if old_metadata is not None and _describes_source(old_metadata, source):
+            # Touched but not edited: keep the old annotation
+            metadata = old_metadata
+        else:
+            metadata = self._annotate(source, rel_path)
+        if old_metadata is None:
+            self._import_lookup_cache = None  # new file
         idx.files[rel_path] = metadata
         idx.total_files = len(idx.files)
         idx.total_lines += metadata.total_lines
@@ -238,12 +580,15 @@ class ProjectIndexer:
         # Rebuild symbol table entries for this file
         for func in metadata.functions:
             if func.qualified_name not in idx.symbol_table:
-                idx.symbol_table[func.qualified_name] = rel_path
+                idx.symbol_table[sys.intern(func.qualified_name)] = rel_path
+                added_symbols.add(func.qualified_name)
             if func.name not in idx.symbol_table:
-                idx.symbol_table[func.name] = rel_path
+                idx.symbol_table[sys.intern(func.name)] = rel_path
+                added_symbols.add(func.name)
         for cls in metadata.classes:
             if cls.name not in idx.symbol_table:
-                idx.symbol_table[cls.name] = rel_path
+                idx.symbol_table[sys.intern(cls.name)] = rel_path
+                added_symbols.add(cls.name)
 
         # Rebuild import graph for this file
         file_imports = self._resolve_imports_for_file(rel_path, metadata, idx.files)
@@ -251,18 +596,21 @@ class ProjectIndexer:
             idx.import_graph[rel_path] = file_imports
         else:
             idx.import_graph.pop(rel_path, None)
+        # Only this file's outgoing edges changed; patch just those in the reverse graph
+        self._update_reverse_edges(idx.reverse_import_graph, rel_path, old_imports, file_imports)
 
-        if not skip_graph_rebuild:
-            # Rebuild reverse import graph
-            idx.reverse_import_graph = self._build_reverse_graph(idx.import_graph)
-
-            # Rebuild global dependency graphs (full rebuild is simplest for correctness)
+        if skip_graph_rebuild:
+            self._dep_edges_stale = True
+        elif self._dep_edges_stale or removed_symbols != added_symbols:
+            # The set of known symbols changed, so other files' edges may too
             idx.global_dependency_graph = self._build_global_dependency_graph(
                 idx.files, idx.symbol_table
             )
             idx.reverse_dependency_graph = self._build_reverse_graph(
                 idx.global_dependency_graph
             )
+        else:
+            self._patch_dependency_edges(idx, rel_path, metadata)
 
     def remove_file(self, file_path: str) -> None:
         """Remove a file from the index. Does NOT rebuild cross-file graphs.
@@ -276,12 +624,8 @@ class ProjectIndexer:
             raise RuntimeError("Cannot remove_file before initial index() call.")
 
         # Normalize to relative path
-        abs_path = (
-            os.path.abspath(file_path)
-            if os.path.isabs(file_path)
-            else os.path.join(self.root_path, file_path)
-        )
-        rel_path = os.path.relpath(abs_path, self.root_path)
+        abs_path = os.path.abspath(os.path.join(self.root_path, file_path))
+        rel_path = sys.intern(self._relpath(abs_path))
 
         idx = self._project_index
         old_metadata = idx.files.get(rel_path)
@@ -299,9 +643,8 @@ class ProjectIndexer:
                 del idx.symbol_table[cls.name]
 
         # Remove from import graphs
-        idx.import_graph.pop(rel_path, None)
-        for targets in idx.reverse_import_graph.values():
-            targets.discard(rel_path)
+        old_imports = idx.import_graph.pop(rel_path, set())
+        self._update_reverse_edges(idx.reverse_import_graph, rel_path, old_imports, set())
 
         # Update stats
         idx.total_lines -= old_metadata.total_lines
@@ -311,6 +654,8 @@ class ProjectIndexer:
         # Remove the file entry
         del idx.files[rel_path]
         idx.total_files = len(idx.files)
+        self._import_lookup_cache = None
+        self._dep_edges_stale = True
 
     def rebuild_graphs(self) -> None:
         """Rebuild all cross-file graphs from current file data.
@@ -331,61 +676,150 @@ class ProjectIndexer:
             idx.global_dependency_graph
         )
 
+    def is_git_repo(self) -> bool:
+        """Whether root_path is inside a git work tree. Checked once per indexer."""
+        if self._is_git_repo is None:
+            self._is_git_repo = is_git_repo(self.root_path)
+        return self._is_git_repo
+
+    def head_commit(self, refresh: bool = False) -> str | None:
+        """HEAD commit of root_path, cached until refresh=True.
+
+        Pass refresh=True after anything that may have moved HEAD, e.g. before
+        recording the ref an incremental update brought the index up to.
+        """
+        if refresh or self._head_commit is None:
+            self._head_commit = get_head_commit(self.root_path) if self.is_git_repo() else None
+        return self._head_commit
+
     # ------------------------------------------------------------------
     # File discovery
     # ------------------------------------------------------------------
 
     def _discover_files(self) -> list[str]:
-        """Discover files matching include patterns, excluding exclude patterns."""
-        root = Path(self.root_path)
-        matched: set[str] = set()
+        """Discover files matching include patterns, excluding exclude patterns.
 
-        for pattern in self.include_patterns:
-            for p in root.glob(pattern):
-                if p.is_file():
-                    abs_str = str(p)
-                    rel_str = os.path.relpath(abs_str, self.root_path)
-
-                    if self._is_excluded(rel_str):
-                        continue
+        One os.scandir walk serves every include pattern. Directories that the
+        exclude patterns rule out wholesale (e.g. node_modules) are never entered,
+        and symlinked directories are not followed, matching Path.glob("**/...").
+        """
+        name_re = self._include_name_re
+        path_globs = self._include_path_globs
+        exclude_names = self._exclude_names
+        exclude_re = self._exclude_re
+        exclude_dir_re = self._exclude_dir_re
+
+        matched: list[str] = []
+        stack = [(self.root_path, "")]
+        while stack:
+            dir_path, rel_dir = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
 
-                    # Check file size
-                    try:
-                        size = p.stat().st_size
-                    except OSError:
+            for entry in entries:
+                rel_str = rel_dir + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Every file below would be excluded; don't enter it.
+                        if entry.name in exclude_names or (
+                            exclude_dir_re is not None and exclude_dir_re.match(rel_str + "/")
+                        ):
+                            continue
+                        stack.append((entry.path, rel_str + "/"))
                         continue
-                    if size > self.max_file_size_bytes:
-                        logger.debug("Skipping %s (size %d > %d)", rel_str, size, self.max_file_size_bytes)
+                    if not entry.is_file():
                         continue
-
-                    matched.add(abs_str)
+                except OSError:
+                    continue
+
+                if not (name_re is not None and name_re.match(entry.name)) and not any(
+                    _glob_match(segments, rel_str.split("/")) for segments in path_globs
+                ):
+                    continue
+
+                # _is_excluded(), minus what the walk already guarantees: rel_str
+                # uses "/" and no ancestor directory has an excluded name.
+                if entry.name in exclude_names or (
+                    exclude_re is not None and exclude_re.match(rel_str)
+                ):
+                    continue
+
+                # Check file size (DirEntry caches the stat result)
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                if size > self.max_file_size_bytes:
+                    logger.debug("Skipping %s (size %d > %d)", rel_str, size, self.max_file_size_bytes)
+                    continue
+
+                matched.append(entry.path)
 
         return sorted(matched)
 
+    def _relpath(self, abs_path: str) -> str:
+        """abs_path relative to root_path; abs_path must already be normalized.
+
+        Paths under the root just lose the prefix, skipping the splitting and
+        rejoining os.path.relpath does; anything else still goes through it.
+        """
+        if abs_path.startswith(self._root_prefix):
+            return abs_path[len(self._root_prefix):]
+        return os.path.relpath(abs_path, self.root_path)
+
     def _is_excluded(self, rel_path: str) -> bool:
         """Check if a relative path matches any exclude pattern."""
         # Normalize separators to forward slashes for matching
         normalized = rel_path.replace(os.sep, "/")
-        for pattern in self.exclude_patterns:
-            if fnmatch.fnmatch(normalized, pattern):
-                return True
-            # Also check if any path component matches
-            # e.g., "__pycache__" in the path
-            parts = normalized.split("/")
-            # Check simple directory name exclusions
-            pattern_parts = pattern.replace("**/", "").replace("/**", "").strip("/")
-            if pattern_parts in parts:
-                return True
-        return False
+        if self._exclude_re is not None and self._exclude_re.match(normalized):
+            return True
+        # Also check simple directory/file name exclusions against each
+        # path component, e.g. "__pycache__" anywhere in the path
+        return not self._exclude_names.isdisjoint(normalized.split("/"))
 
     def _read_file(self, abs_path: str) -> str:
         """Read a file as text, trying UTF-8 first then latin-1 as fallback."""
-        try:
-            with open(abs_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except UnicodeDecodeError:
-            with open(abs_path, "r", encoding="latin-1") as f:
-                return f.read()
+        return _read_source(abs_path)
+
+    def _annotate_all(
+        self, jobs: list[tuple[str, str, str | None]]
+    ) -> list[tuple[str, StructuralMetadata | None, str | None]]:
+        """Annotate files across a worker pool, in discovery order.
+
+        Annotation is CPU-bound regex/AST work, so with the GIL on it runs in a
+        process pool; on a free-threaded interpreter threads give the same
+        parallelism without pickling results back. Falls back to annotating
+        in-process when only one worker is allowed, the project is too small to
+        amortize worker start-up, or the pool cannot be started; without a cache,
+        that path overlaps reading the next files with annotating the current one.
+        """
+        if self.max_workers > 1 and len(jobs) >= _PARALLEL_MIN_FILES:
+            workers = min(self.max_workers, len(jobs))
+            executor: Executor
+            try:
+                if _gil_disabled():
+                    executor = ThreadPoolExecutor(max_workers=workers)
+                    chunksize = 1  # ignored by thread pools
+                else:
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                    chunksize = max(1, min(32, len(jobs) // (workers * 4)))
+                with executor:
+                    return list(executor.map(_annotate_file, jobs, chunksize=chunksize))
+            except (OSError, RuntimeError) as e:
+                # BrokenProcessPool is a RuntimeError; sandboxes may also refuse to fork.
+                logger.warning("Worker pool unavailable, indexing serially: %s", e)
+        if self.cache_dir is None and len(jobs) > 1:
+            return _annotate_prefetched(jobs)
+        return [_annotate_file(job) for job in jobs]
+
+    def _annotate(self, source: str, rel_path: str) -> StructuralMetadata:
+        """Annotate a file's source, going through the annotation cache if enabled."""
+        if self._annotation_cache is not None:
+            return self._annotation_cache.annotate(source, source_name=rel_path)
+        return annotate(source, source_name=rel_path)
 
     # ------------------------------------------------------------------
     # Symbol table
@@ -397,7 +831,9 @@ class ProjectIndexer:
         """Build global symbol table: symbol_name -> file_path where defined.
 
         For methods, use qualified_name (e.g., "MyClass.run" -> "src/engine.py").
-        First-found wins for duplicates.
+        First-found wins for duplicates. Names and paths are interned here and in
+        the graph builders, since each one repeats across the table and all four
+        graphs.
         """
         symbol_table: dict[str, str] = {}
 
@@ -405,14 +841,14 @@ class ProjectIndexer:
             for func in metadata.functions:
                 # Register by qualified name (e.g., "MyClass.method")
                 if func.qualified_name not in symbol_table:
-                    symbol_table[func.qualified_name] = file_path
+                    symbol_table[sys.intern(func.qualified_name)] = file_path
                 # Also register by simple name for top-level functions
                 if not func.is_method and func.name not in symbol_table:
-                    symbol_table[func.name] = file_path
+                    symbol_table[sys.intern(func.name)] = file_path
 
             for cls in metadata.classes:
                 if cls.name not in symbol_table:
-                    symbol_table[cls.name] = file_path
+                    symbol_table[sys.intern(cls.name)] = file_path
 
         return symbol_table
 
@@ -441,21 +877,27 @@ class ProjectIndexer:
     ) -> set[str]:
         """Resolve a file's imports to other project files."""
         targets: set[str] = set()
-        all_file_set = set(all_files.keys())
+        lookup = self._import_lookup(all_files)
 
         for imp in metadata.imports:
-            resolved = self._resolve_import(file_path, imp.module, imp.is_from_import, all_file_set)
+            resolved = self._resolve_import(file_path, imp.module, imp.is_from_import, lookup)
             if resolved and resolved != file_path:
-                targets.add(resolved)
+                targets.add(sys.intern(resolved))
 
         return targets
 
+    def _import_lookup(self, all_files: dict[str, StructuralMetadata]) -> _ImportLookup:
+        """Lookup tables for all_files, shared by index(), rebuild_graphs() and reindex_file()."""
+        if self._import_lookup_cache is None:
+            self._import_lookup_cache = _build_import_lookup(all_files)
+        return self._import_lookup_cache
+
     def _resolve_import(
         self,
         importing_file: str,
         module_path: str,
         is_from_import: bool,
-        all_files: set[str],
+        lookup: _ImportLookup,
     ) -> str | None:
         """Resolve an import module path to a project file path.
 
@@ -472,44 +914,30 @@ class ProjectIndexer:
             return None
 
         ext = os.path.splitext(importing_file)[1].lower()
+        all_files = lookup.files
 
         if ext == ".py":
-            return self._resolve_python_import(module_path, all_files)
+            return self._resolve_python_import(module_path, lookup.py_modules)
         elif ext in (".ts", ".tsx", ".js", ".jsx"):
             return self._resolve_ts_import(importing_file, module_path, all_files)
         elif ext == ".rs":
             return self._resolve_rust_import(importing_file, module_path, all_files)
         elif ext == ".go":
-            return self._resolve_go_import(module_path, all_files)
+            return self._resolve_go_import(module_path, lookup.go_dirs)
         elif ext == ".cs":
             return self._resolve_csharp_import(module_path, all_files)
 
         return None
 
     def _resolve_python_import(
-        self, module_path: str, all_files: set[str]
+        self, module_path: str, py_modules: dict[str, str]
     ) -> str | None:
-        """Resolve a Python module path to a project file."""
-        # Convert dots to path separators
-        rel_module = module_path.replace(".", "/")
+        """Resolve a Python module path to a project file.
 
-        # Search directories: root, src/, lib/
-        search_prefixes = ["", "src/", "lib/"]
-
-        for prefix in search_prefixes:
-            # Try as a .py file
-            candidate = prefix + rel_module + ".py"
-            candidate_normalized = candidate.replace(os.sep, "/")
-            if candidate_normalized in all_files:
-                return candidate_normalized
-
-            # Try as a package (__init__.py)
-            candidate = prefix + rel_module + "/__init__.py"
-            candidate_normalized = candidate.replace(os.sep, "/")
-            if candidate_normalized in all_files:
-                return candidate_normalized
-
-        return None
+        Looks for module.py or module/__init__.py under the root, src/ and
+        lib/, in that order, via the precomputed py_modules table.
+        """
+        return py_modules.get(module_path.replace(".", "/"))
 
     def _resolve_ts_import(
         self, importing_file: str, module_path: str, all_files: set[str]
@@ -607,31 +1035,23 @@ class ProjectIndexer:
         return None
 
     def _resolve_go_import(
-        self, module_path: str, all_files: set[str]
+        self, module_path: str, go_dirs: dict[str, str]
     ) -> str | None:
         """Resolve a Go import path to a project directory's .go files.
 
-        Matches import path suffixes against project directories containing .go files.
+        Matches import path suffixes against project directories containing .go
+        files (go_dirs maps each such directory to one of its files).
         """
         if not module_path:
             return None
 
-        # Build a mapping of directory -> any .go file in that dir
-        dir_to_file: dict[str, str] = {}
-        for f in all_files:
-            if f.endswith('.go'):
-                d = os.path.dirname(f)
-                if d not in dir_to_file:
-                    dir_to_file[d] = f
-
         # Try matching the import path suffix against directory paths
         # e.g., "github.com/user/repo/pkg/utils" -> look for dirs ending with "pkg/utils"
         path_parts = module_path.split('/')
         for length in range(len(path_parts), 0, -1):
             suffix = '/'.join(path_parts[-length:])
-            for d, f in dir_to_file.items():
-                normalized = d.replace(os.sep, '/')
-                if normalized == suffix or normalized.endswith('/' + suffix):
+            for d, f in go_dirs.items():
+                if d == suffix or d.endswith('/' + suffix):
                     return f
 
         return None
@@ -690,81 +1110,151 @@ class ProjectIndexer:
         function/class body for references to imported names.
         """
         global_graph: dict[str, set[str]] = {}
-
-        # Set of all known qualified names in the project
-        all_symbols = set(symbol_table.keys())
+        file_edges: dict[str, dict[str, set[str]]] = {}
+        key_files: dict[str, list[str]] = {}
 
         for file_path, metadata in files.items():
-            # Collect imported names mapping: local_name -> qualified_name (symbol table key)
-            imported_names: dict[str, str] = {}
-            for imp in metadata.imports:
-                for name in imp.names:
-                    # Check if this name is a known symbol
-                    if name in symbol_table:
-                        imported_names[name] = name
-
-            # Process per-file dependency graph (intra-file deps)
-            for source_name, deps in metadata.dependency_graph.items():
-                source_qualified = self._qualify_name(source_name, file_path, symbol_table)
-                if source_qualified not in global_graph:
-                    global_graph[source_qualified] = set()
-
-                for dep in deps:
-                    dep_qualified = None
-
-                    # Check if it's an imported name
-                    if dep in imported_names:
-                        dep_qualified = imported_names[dep]
-
-                    # Check if it's a local name in the same file
-                    if dep_qualified is None:
-                        candidate = self._qualify_name(dep, file_path, symbol_table)
-                        if candidate in all_symbols:
-                            dep_qualified = candidate
-
-                    # Check if it's a known global symbol
-                    if dep_qualified is None and dep in all_symbols:
-                        dep_qualified = dep
-
-                    if dep_qualified and dep_qualified != source_qualified:
-                        global_graph[source_qualified].add(dep_qualified)
-
-            # Now handle cross-file dependencies by scanning function/class bodies
-            # for references to imported names (which the per-file dep graph misses).
-            if not imported_names:
+            edges = self._dep_edges_for_file(file_path, metadata, symbol_table)
+            if not edges:
                 continue
+            file_edges[file_path] = edges
+            for key, deps in edges.items():
+                key_files.setdefault(key, []).append(file_path)
+                # Never mutate a file's own sets: a key with a single contributing
+                # file shares that file's set, shared keys get a fresh union.
+                merged = global_graph.get(key)
+                global_graph[key] = deps if merged is None else merged | deps
+
+        self._file_dep_edges = file_edges
+        self._dep_key_files = key_files
+        self._dep_edges_stale = False
+        return global_graph
 
-            for func in metadata.functions:
-                func_qualified = self._qualify_name(
-                    func.qualified_name, file_path, symbol_table
-                )
-                if func_qualified not in global_graph:
-                    global_graph[func_qualified] = set()
-
-                # Scan the function body lines for imported name references
-                start_idx = func.line_range.start - 1  # 0-indexed
-                end_idx = func.line_range.end  # exclusive
-                body_text = " ".join(metadata.lines[start_idx:end_idx])
-                for local_name, resolved_name in imported_names.items():
-                    if re.search(r'\b' + re.escape(local_name) + r'\b', body_text):
-                        if resolved_name != func_qualified:
-                            global_graph[func_qualified].add(resolved_name)
+    def _dep_edges_for_file(
+        self,
+        file_path: str,
+        metadata: StructuralMetadata,
+        symbol_table: dict[str, str],
+    ) -> dict[str, set[str]]:
+        """Dependency edges whose source is a symbol defined in this file.
 
-            for cls in metadata.classes:
-                cls_qualified = self._qualify_name(cls.name, file_path, symbol_table)
-                if cls_qualified not in global_graph:
-                    global_graph[cls_qualified] = set()
-
-                # Scan the class body lines for imported name references
-                start_idx = cls.line_range.start - 1
-                end_idx = cls.line_range.end
-                body_text = " ".join(metadata.lines[start_idx:end_idx])
-                for local_name, resolved_name in imported_names.items():
-                    if re.search(r'\b' + re.escape(local_name) + r'\b', body_text):
-                        if resolved_name != cls_qualified:
-                            global_graph[cls_qualified].add(resolved_name)
+        Depends on other files only through which names the symbol table knows.
+        """
+        file_graph: dict[str, set[str]] = {}
 
-        return global_graph
+        # Collect imported names mapping: local_name -> qualified_name (symbol table key)
+        imported_names: dict[str, str] = {}
+        for imp in metadata.imports:
+            for name in imp.names:
+                # Check if this name is a known symbol
+                if name in symbol_table:
+                    imported_names[name] = name
+
+        # Process per-file dependency graph (intra-file deps)
+        for source_name, deps in metadata.dependency_graph.items():
+            source_qualified = self._qualify_name(source_name, file_path, symbol_table)
+            source_deps = file_graph.setdefault(sys.intern(source_qualified), set())
+
+            for dep in deps:
+                dep_qualified = None
+
+                # Check if it's an imported name
+                if dep in imported_names:
+                    dep_qualified = imported_names[dep]
+
+                # Check if it's a local name in the same file
+                if dep_qualified is None:
+                    candidate = self._qualify_name(dep, file_path, symbol_table)
+                    if candidate in symbol_table:
+                        dep_qualified = candidate
+
+                # Check if it's a known global symbol
+                if dep_qualified is None and dep in symbol_table:
+                    dep_qualified = dep
+
+                if dep_qualified and dep_qualified != source_qualified:
+                    source_deps.add(sys.intern(dep_qualified))
+
+        # Now handle cross-file dependencies by scanning function/class bodies
+        # for references to imported names (which the per-file dep graph misses).
+        if not imported_names:
+            return file_graph
+        # One regex pass per body finds every imported name it mentions.
+        name_scan = _compile_name_scan(imported_names)
+        # Bodies are scanned in place within the file text, found by line offsets,
+        # instead of re-joining their lines (class bodies would repeat their methods).
+        lines = metadata.lines
+        text = "\n".join(lines)
+        line_starts = list(
+            map(add, accumulate(map(len, lines), initial=0), range(len(lines) + 1))
+        )
+        last_line = len(lines)
+
+        for func in metadata.functions:
+            func_qualified = self._qualify_name(
+                func.qualified_name, file_path, symbol_table
+            )
+            func_deps = file_graph.setdefault(sys.intern(func_qualified), set())
+
+            # Scan the function body lines for imported name references
+            start_idx = min(func.line_range.start - 1, last_line)  # 0-indexed
+            end_idx = min(func.line_range.end, last_line)  # exclusive
+            body = (line_starts[start_idx], line_starts[end_idx])
+            for local_name in _scan_names(name_scan, text, *body):
+                resolved_name = imported_names[local_name]
+                if resolved_name != func_qualified:
+                    func_deps.add(sys.intern(resolved_name))
+
+        for cls in metadata.classes:
+            cls_qualified = self._qualify_name(cls.name, file_path, symbol_table)
+            cls_deps = file_graph.setdefault(sys.intern(cls_qualified), set())
+
+            # Scan the class body lines for imported name references
+            start_idx = min(cls.line_range.start - 1, last_line)
+            end_idx = min(cls.line_range.end, last_line)
+            body = (line_starts[start_idx], line_starts[end_idx])
+            for local_name in _scan_names(name_scan, text, *body):
+                resolved_name = imported_names[local_name]
+                if resolved_name != cls_qualified:
+                    cls_deps.add(sys.intern(resolved_name))
+
+        return file_graph
+
+    def _patch_dependency_edges(
+        self, idx: ProjectIndex, file_path: str, metadata: StructuralMetadata
+    ) -> None:
+        """Replace one file's edges in the dependency graphs, leaving the rest untouched.
+
+        Only valid while the set of symbol-table names is what the graph was
+        built against; reindex_file falls back to a full rebuild otherwise.
+        """
+        graph = idx.global_dependency_graph
+
+        old_edges = self._file_dep_edges.pop(file_path, {})
+        new_edges = self._dep_edges_for_file(file_path, metadata, idx.symbol_table)
+        if new_edges:
+            self._file_dep_edges[file_path] = new_edges
+
+        for key in old_edges.keys() | new_edges.keys():
+            contributors = self._dep_key_files.setdefault(key, [])
+            if key in old_edges:
+                contributors.remove(file_path)
+            if key in new_edges:
+                contributors.append(file_path)
+
+            merged: set[str] | None = None
+            for contributor in contributors:
+                deps = self._file_dep_edges[contributor][key]
+                merged = deps if merged is None else merged | deps
+
+            old_targets = graph.get(key, set())
+            if merged is None:
+                graph.pop(key, None)
+                del self._dep_key_files[key]
+                merged = set()
+            else:
+                graph[key] = merged
+            self._update_reverse_edges(idx.reverse_dependency_graph, key, old_targets, merged)
 
     def _qualify_name(
         self, name: str, file_path: str, symbol_table: dict[str, str]
@@ -787,10 +1277,29 @@ class ProjectIndexer:
         graph: dict[str, set[str]],
     ) -> dict[str, set[str]]:
         """Build a reverse graph: for each target, collect all sources."""
-        reverse: dict[str, set[str]] = {}
+        reverse: defaultdict[str, set[str]] = defaultdict(set)
         for source, targets in graph.items():
             for target in targets:
-                if target not in reverse:
-                    reverse[target] = set()
                 reverse[target].add(source)
-        return reverse
+        return dict(reverse)
+
+    @staticmethod
+    def _update_reverse_edges(
+        reverse: dict[str, set[str]],
+        source: str,
+        old_targets: set[str],
+        new_targets: set[str],
+    ) -> None:
+        """Patch a reverse graph after source's targets changed from old to new.
+
+        Leaves the graph exactly as _build_reverse_graph would rebuild it,
+        including dropping targets that no longer have any source.
+        """
+        for target in old_targets - new_targets:
+            sources = reverse.get(target)
+            if sources is not None:
+                sources.discard(source)
+                if not sources:
+                    del reverse[target]
+        for target in new_targets - old_targets:
+            reverse.setdefault(target, set()).add(source)
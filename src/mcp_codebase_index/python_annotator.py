@@ -20,10 +20,17 @@
 
 Uses Python's ast module to extract structural information from Python source code:
 functions, classes, imports, and a best-effort dependency graph.
+Identifiers from the parser are already interned; names built from them here
+(dotted decorators and bases, qualified names, *args/**kwargs) are interned
+too, since the same ones repeat across every file of a project.
 """
 
 import ast
+import inspect
 import logging
+from collections import deque
+from sys import intern
+from typing import cast
 
 from mcp_codebase_index.models import (
     ClassInfo,
@@ -35,63 +42,72 @@ from mcp_codebase_index.models import (
 
 logger = logging.getLogger(__name__)
 
-
-def _compute_line_offsets(source: str) -> tuple[list[str], list[int]]:
-    """Split source into lines and compute character offsets for each line start."""
-    lines = source.splitlines(keepends=False)
-    offsets: list[int] = []
-    offset = 0
-    for i, line in enumerate(lines):
-        offsets.append(offset)
-        # +1 for the newline character (or the last line which may not have one)
-        offset += len(line) + 1
-    return lines, offsets
+# Node kinds are tested with `type(node) is ast.X` throughout: ast.parse never
+# produces subclasses, and an identity check skips isinstance's MRO walk.
 
 
 def _decorator_name(node: ast.expr) -> str:
     """Extract a readable name from a decorator AST node."""
-    if isinstance(node, ast.Name):
+    if type(node) is ast.Name:
         return node.id
-    if isinstance(node, ast.Attribute):
+    if type(node) is ast.Attribute:
         parts = []
         current: ast.expr = node
-        while isinstance(current, ast.Attribute):
+        while type(current) is ast.Attribute:
             parts.append(current.attr)
             current = current.value
-        if isinstance(current, ast.Name):
+        if type(current) is ast.Name:
             parts.append(current.id)
-        return ".".join(reversed(parts))
-    if isinstance(node, ast.Call):
+        return intern(".".join(reversed(parts)))
+    if type(node) is ast.Call:
         return _decorator_name(node.func)
     return ast.dump(node)
 
 
 def _base_name(node: ast.expr) -> str:
     """Extract a readable name from a base class AST node."""
-    if isinstance(node, ast.Name):
+    if type(node) is ast.Name:
         return node.id
-    if isinstance(node, ast.Attribute):
+    if type(node) is ast.Attribute:
         parts = []
         current: ast.expr = node
-        while isinstance(current, ast.Attribute):
+        while type(current) is ast.Attribute:
             parts.append(current.attr)
             current = current.value
-        if isinstance(current, ast.Name):
+        if type(current) is ast.Name:
             parts.append(current.id)
-        return ".".join(reversed(parts))
-    if isinstance(node, ast.Subscript):
+        return intern(".".join(reversed(parts)))
+    if type(node) is ast.Subscript:
         # e.g., Generic[T]
         return _base_name(node.value)
     return ast.dump(node)
 
 
+def _docstring(node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef) -> str | None:
+    """Same result as ast.get_docstring(node), cheaper for one-line docstrings.
+
+    inspect.cleandoc only left-strips a single line without tabs, so that
+    common case skips its split/dedent/rejoin.
+    """
+    body = node.body
+    if not body or type(body[0]) is not ast.Expr:
+        return None
+    value = body[0].value
+    if type(value) is not ast.Constant or not isinstance(value.value, str):
+        return None
+    text = value.value
+    if "\n" not in text and "\t" not in text:
+        return text.lstrip()
+    return inspect.cleandoc(text)
+
+
 def _extract_function_info(
     node: ast.FunctionDef | ast.AsyncFunctionDef,
     parent_class: str | None = None,
 ) -> FunctionInfo:
     """Extract FunctionInfo from a function/method AST node."""
     is_method = parent_class is not None
-    qualified_name = f"{parent_class}.{node.name}" if parent_class else node.name
+    qualified_name = intern(f"{parent_class}.{node.name}") if parent_class else node.name
 
     # Parameters: skip self/cls for methods
     params: list[str] = []
@@ -101,14 +117,14 @@ def _extract_function_info(
         params.append(arg.arg)
     # Also include *args and **kwargs style params
     if node.args.vararg:
-        params.append(f"*{node.args.vararg.arg}")
+        params.append(intern(f"*{node.args.vararg.arg}"))
     for arg in node.args.kwonlyargs:
         params.append(arg.arg)
     if node.args.kwarg:
-        params.append(f"**{node.args.kwarg.arg}")
+        params.append(intern(f"**{node.args.kwarg.arg}"))
 
     decorators = [_decorator_name(d) for d in node.decorator_list]
-    docstring = ast.get_docstring(node)
+    docstring = _docstring(node)
 
     # Line range: account for decorators
     start_line = node.lineno
@@ -131,21 +147,14 @@ def _extract_class_info(node: ast.ClassDef) -> ClassInfo:
     """Extract ClassInfo from a class AST node."""
     base_classes = [_base_name(b) for b in node.bases]
     decorators = [_decorator_name(d) for d in node.decorator_list]
-    docstring = ast.get_docstring(node)
+    docstring = _docstring(node)
 
-    methods: list[FunctionInfo] = []
-    for child in ast.walk(node):
-        if child is node:
-            continue
-        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            # Only direct methods (check parent is this class)
-            pass
-
-    # Use iter_child_nodes to get only direct children
-    methods = []
-    for child in ast.iter_child_nodes(node):
-        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            methods.append(_extract_function_info(child, parent_class=node.name))
+    # Only statements directly in the class body are its methods
+    methods = [
+        _extract_function_info(child, parent_class=node.name)
+        for child in node.body
+        if type(child) is ast.FunctionDef or type(child) is ast.AsyncFunctionDef
+    ]
 
     start_line = node.lineno
     if node.decorator_list:
@@ -161,89 +170,139 @@ def _extract_class_info(node: ast.ClassDef) -> ClassInfo:
     )
 
 
-def _collect_name_references(node: ast.AST) -> set[str]:
-    """Collect all Name and Attribute references in an AST subtree."""
-    refs: set[str] = set()
-    for child in ast.walk(node):
-        if isinstance(child, ast.Name):
-            refs.add(child.id)
-        elif isinstance(child, ast.Attribute):
-            # Collect the full dotted name's root
-            current: ast.expr = child
-            while isinstance(current, ast.Attribute):
+def _imports_from_node(node: ast.Import | ast.ImportFrom) -> list[ImportInfo]:
+    """Build the ImportInfo records for one import statement."""
+    if isinstance(node, ast.Import):
+        return [
+            ImportInfo(
+                module=alias.name,
+                names=[],
+                alias=alias.asname,
+                line_number=node.lineno,
+                is_from_import=False,
+            )
+            for alias in node.names
+        ]
+    module = node.module or ""
+    names = [alias.name for alias in node.names]
+    # For `from X import Y as Z`, we record Y in names and Z as alias
+    # But ImportInfo has a single alias field - use it for single-name imports
+    alias = None
+    if len(node.names) == 1 and node.names[0].asname:
+        alias = node.names[0].asname
+    return [
+        ImportInfo(
+            module=module,
+            names=names,
+            alias=alias,
+            line_number=node.lineno,
+            is_from_import=True,
+        )
+    ]
+
+
+def _scan_module(
+    tree: ast.Module,
+    collect_refs: bool = True,
+) -> tuple[list[FunctionInfo], list[ClassInfo], list[ImportInfo], list[tuple[str, set[str]]]]:
+    """Collect functions, classes, imports and name references in one traversal.
+
+    Top-level statements are dispatched once for functions and classes. A
+    single breadth-first walk below them then finds every import statement,
+    nested ones included, in the order ast.walk would, and records the Name
+    and Attribute-root references under each top-level def or class.
+
+    Returns:
+        (functions, classes, imports, refs), where refs pairs each top-level
+        def/class name with the names its subtree references, in source order.
+        refs is empty when collect_refs is False.
+    """
+    functions: list[FunctionInfo] = []
+    classes: list[ClassInfo] = []
+    imports: list[ImportInfo] = []
+    owners: list[tuple[str, set[str]]] = []
+    # Each pending node carries the reference set of the top-level def/class
+    # it belongs to, or None outside any.
+    queue: deque[tuple[ast.AST, set[str] | None]] = deque()
+
+    for stmt in tree.body:
+        refs: set[str] | None = None
+        stmt_type = type(stmt)
+        if stmt_type is ast.FunctionDef or stmt_type is ast.AsyncFunctionDef:
+            func = cast(ast.FunctionDef | ast.AsyncFunctionDef, stmt)
+            func_info = _extract_function_info(func, parent_class=None)
+            functions.append(func_info)
+            if collect_refs:
+                refs = set()
+                owners.append((func_info.name, refs))
+        elif stmt_type is ast.ClassDef:
+            class_info = _extract_class_info(cast(ast.ClassDef, stmt))
+            classes.append(class_info)
+            # Also add methods to the top-level functions list for easy lookup
+            functions.extend(class_info.methods)
+            if collect_refs:
+                refs = set()
+                owners.append((class_info.name, refs))
+        queue.append((stmt, refs))
+
+    node: ast.AST
+    while queue:
+        node, refs = queue.popleft()
+        node_type = type(node)
+        if node_type is ast.Import or node_type is ast.ImportFrom:
+            imports.extend(_imports_from_node(cast(ast.Import | ast.ImportFrom, node)))
+            continue
+        if node_type is ast.Name:
+            if refs is not None:
+                refs.add(cast(ast.Name, node).id)
+            continue
+        if node_type is ast.Attribute:
+            # Only the root of a dotted chain can reference a name, so go
+            # straight to it rather than visiting every link.
+            current = cast(ast.Attribute, node).value
+            while type(current) is ast.Attribute:
                 current = current.value
-            if isinstance(current, ast.Name):
-                refs.add(current.id)
-    return refs
+            if type(current) is ast.Name:
+                if refs is not None:
+                    refs.add(current.id)
+            else:
+                queue.append((current, refs))
+            continue
+        # Inlined ast.iter_child_nodes, without the generator overhead
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                queue.extend((item, refs) for item in value if isinstance(item, ast.AST))
+            elif isinstance(value, ast.AST):
+                queue.append((value, refs))
+
+    return functions, classes, imports, owners
 
 
 def _build_dependency_graph(
-    tree: ast.Module,
-    defined_names: set[str],
+    owners: list[tuple[str, set[str]]],
+    defined_names: frozenset[str],
 ) -> dict[str, list[str]]:
     """Build a dependency graph mapping each defined name to the other defined names it references.
 
-    For classes, we use the class name as the key and collect references from the
-    entire class body. For functions, we collect references from the function body.
+    owners pairs each top-level function or class with the names referenced
+    anywhere in its subtree (for classes, the entire class body).
     """
     graph: dict[str, list[str]] = {}
-
-    for node in ast.iter_child_nodes(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            refs = _collect_name_references(node)
-            # Remove self-reference and keep only defined names
-            deps = sorted(refs & defined_names - {node.name})
-            graph[node.name] = deps
-
-        elif isinstance(node, ast.ClassDef):
-            refs = _collect_name_references(node)
-            deps = sorted(refs & defined_names - {node.name})
-            graph[node.name] = deps
-
+    for name, refs in owners:
+        # Keep only defined names, then drop the self-reference in place
+        deps = refs & defined_names
+        deps.discard(name)
+        graph[name] = sorted(deps) if len(deps) > 1 else list(deps)
     return graph
 
 
-def _extract_imports(tree: ast.Module) -> list[ImportInfo]:
-    """Extract all import statements from the AST."""
-    imports: list[ImportInfo] = []
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for alias in node.names:
-                imports.append(
-                    ImportInfo(
-                        module=alias.name,
-                        names=[],
-                        alias=alias.asname,
-                        line_number=node.lineno,
-                        is_from_import=False,
-                    )
-                )
-        elif isinstance(node, ast.ImportFrom):
-            module = node.module or ""
-            names = [alias.name for alias in node.names]
-            # For `from X import Y as Z`, we record Y in names and Z as alias
-            # But ImportInfo has a single alias field - use it for single-name imports
-            alias = None
-            if len(node.names) == 1 and node.names[0].asname:
-                alias = node.names[0].asname
-            imports.append(
-                ImportInfo(
-                    module=module,
-                    names=names,
-                    alias=alias,
-                    line_number=node.lineno,
-                    is_from_import=True,
-                )
-            )
-
-    return imports
-
-
-def annotate_python(source: str, source_name: str = "<source>") -> StructuralMetadata:
+def annotate_python(
+    source: str, source_name: str = "<source>", build_graph: bool = True
+) -> StructuralMetadata:
     """Parse Python source code and extract structural metadata.
 
-    Uses ast.parse() to build the AST, then walks it to extract:
+    Uses ast.parse() to build the AST, then walks it once to extract:
     - All function definitions (top-level and methods, including async)
     - All class definitions with base classes, methods, decorators, docstrings
     - All import statements (import X, from X import Y, aliases)
@@ -255,11 +314,22 @@ def annotate_python(source: str, source_name: str = "<source>") -> StructuralMet
     Args:
         source: Python source code as a string.
         source_name: Identifier for error messages.
+        build_graph: When False, skip collecting name references and leave
+            dependency_graph empty, for callers that only need definitions
+            and imports.
 
     Returns:
         StructuralMetadata with code structure populated.
     """
-    lines, line_offsets = _compute_line_offsets(source)
+    # Split on line endings the way the tokenizer counts them, so AST line
+    # numbers index straight into lines. str.splitlines would also break at
+    # form feeds and other Unicode separators, shifting every later line.
+    # line_char_offsets is left to the model, which derives it from lines on
+    # first access; nothing on the indexing path reads it.
+    text = source.replace("\r\n", "\n").replace("\r", "\n") if "\r" in source else source
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()  # trailing newline, or empty source
     total_lines = len(lines)
     total_chars = len(source)
 
@@ -273,40 +343,20 @@ def annotate_python(source: str, source_name: str = "<source>") -> StructuralMet
             total_lines=total_lines,
             total_chars=total_chars,
             lines=lines,
-            line_char_offsets=line_offsets,
         )
 
-    # Extract top-level functions (not methods)
-    functions: list[FunctionInfo] = []
-    classes: list[ClassInfo] = []
-
-    for node in ast.iter_child_nodes(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            functions.append(_extract_function_info(node, parent_class=None))
-        elif isinstance(node, ast.ClassDef):
-            class_info = _extract_class_info(node)
-            classes.append(class_info)
-            # Also add methods to the top-level functions list for easy lookup
-            functions.extend(class_info.methods)
-
-    # Extract imports
-    imports = _extract_imports(tree)
+    functions, classes, imports, owners = _scan_module(tree, collect_refs=build_graph)
 
     # Build dependency graph
-    defined_names: set[str] = set()
-    for f in functions:
-        defined_names.add(f.name)
-    for c in classes:
-        defined_names.add(c.name)
+    defined_names = frozenset(f.name for f in functions) | frozenset(c.name for c in classes)
 
-    dependency_graph = _build_dependency_graph(tree, defined_names)
+    dependency_graph = _build_dependency_graph(owners, defined_names)
 
     return StructuralMetadata(
         source_name=source_name,
         total_lines=total_lines,
         total_chars=total_chars,
         lines=lines,
-        line_char_offsets=line_offsets,
         functions=functions,
         classes=classes,
         imports=imports,
@@ -26,11 +26,18 @@ All functions return plain dicts/strings for easy use in a REPL.
 from __future__ import annotations
 
 import fnmatch
+import functools
 import re
+from bisect import bisect_left, bisect_right
 from collections import deque
-from typing import Callable
+from collections.abc import Callable, Iterator
+from itertools import islice
+from operator import is_
+from typing import Any
 
 from mcp_codebase_index.models import (
+    ClassInfo,
+    FunctionInfo,
     ProjectIndex,
     StructuralMetadata,
 )
@@ -41,6 +48,12 @@ from mcp_codebase_index.models import (
 # ---------------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: str, flags: int = 0) -> re.Pattern[str]:
+    """Compile a search pattern once; repeated tool calls reuse it."""
+    return re.compile(pattern, flags)
+
+
 def create_file_query_functions(metadata: StructuralMetadata) -> dict[str, Callable]:
     """Create query functions bound to a single file's structural metadata.
 
@@ -214,12 +227,12 @@ def create_file_query_functions(metadata: StructuralMetadata) -> dict[str, Calla
     def search_lines(pattern: str) -> list[dict]:
         """Regex search, returns [{line_number, content}], max 100 results."""
         try:
-            regex = re.compile(pattern)
+            search = _compile(pattern).search
         except re.error as e:
             return [{"error": f"Invalid regex: {e}"}]
         results = []
         for i, line in enumerate(metadata.lines):
-            if regex.search(line):
+            if search(line):
                 results.append({"line_number": i + 1, "content": line})
                 if len(results) >= 100:
                     break
@@ -247,15 +260,85 @@ def create_file_query_functions(metadata: StructuralMetadata) -> dict[str, Calla
 # ---------------------------------------------------------------------------
 
 
-def _resolve_file(index: ProjectIndex, file_path: str) -> StructuralMetadata | None:
-    """Resolve a file path to its StructuralMetadata, trying exact and relative matches."""
-    if file_path in index.files:
-        return index.files[file_path]
-    # Try matching against the end of stored paths
-    for stored_path, meta in index.files.items():
-        if stored_path.endswith(file_path) or file_path.endswith(stored_path):
-            return meta
-    return None
+_NO_DEPS: frozenset[str] = frozenset()
+
+
+def _smallest_shortest_path(
+    start: str,
+    graph: dict[str, set[str]],
+    reverse_graph: dict[str, set[str]],
+    forward_depth: dict[str, int],
+    backward_depth: dict[str, int],
+    meetings: list[str],
+) -> list[str]:
+    """Lexicographically smallest shortest path once a bidirectional BFS has met.
+
+    The meeting points are exactly the symbols at the deepest forward level
+    that lie on a shortest path. Walking back through the forward levels from
+    them marks every such symbol up to there; beyond it, backward distances
+    tell. Taking the smallest usable dependency at each hop then gives the
+    same path as a one-sided BFS expanding dependencies in sorted order.
+    """
+    split = forward_depth[meetings[0]]
+    total = split + backward_depth[meetings[0]]
+    on_path = set(meetings)
+    level = on_path
+    for depth in range(split - 1, 0, -1):
+        level = {
+            dependent
+            for node in level
+            for dependent in reverse_graph.get(node, _NO_DEPS)
+            if forward_depth.get(dependent) == depth
+        }
+        on_path |= level
+
+    path = [start]
+    for hop in range(1, total + 1):
+        deps = graph.get(path[-1], _NO_DEPS)
+        if hop <= split:
+            node = min(d for d in deps if d in on_path and forward_depth[d] == hop)
+        else:
+            node = min(d for d in deps if backward_depth.get(d) == total - hop)
+        path.append(node)
+    return path
+
+
+# Pattern features that can match differently on a whole file than on a
+# lone line (\A, \Z, lookarounds, conditionals, flags scoped off), plus a
+# leading "^", which fails fast per line but crawls across a whole file.
+_NOT_LINE_LOCAL = re.compile(r"\\[AZ]|\(\?(?:[=!<(-]|[a-zA-Z]+-)|\A\^")
+
+
+def _matching_lines(
+    scan: Callable[[str, int], re.Match[str] | None],
+    search: Callable[[str], re.Match[str] | None],
+    lines: list[str],
+    text: str,
+) -> Iterator[int]:
+    """Yield indices of lines matched by *search*, scanning *text* in bulk.
+
+    *text* is ``"\n".join(lines)``; *scan* is the same pattern compiled with
+    re.MULTILINE. Each hit found by *scan* is re-checked against its own line
+    with *search* (a match may span lines), then scanning resumes at the next
+    line. Lines *scan* skips cannot match, so for line-local patterns this
+    equals searching each line.
+    """
+    if not lines:
+        return
+    i = 0
+    pos = 0
+    while True:
+        hit = scan(text, pos)
+        if hit is None:
+            return
+        start = hit.start()
+        i += text.count("\n", pos, start)
+        if search(lines[i]):
+            yield i
+        pos = text.find("\n", start) + 1
+        if not pos:
+            return
+        i += 1
 
 
 def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
@@ -264,6 +347,100 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
     Returns a dict mapping function names to callables. Each function returns
     plain dicts or strings suitable for printing in a REPL.
     """
+    # Suffix lookups for _resolve_file, built from the stored paths on the
+    # first inexact lookup and rebuilt when the paths (or their order) change.
+    path_keys: list[str] = []
+    path_order: dict[str, int] = {}
+    # Stored paths reversed and sorted, with each one's position in path_keys
+    reversed_paths: list[str] = []
+    reversed_order: list[int] = []
+
+    def _resolve_file(file_path: str) -> StructuralMetadata | None:
+        """Resolve a file path to its StructuralMetadata, trying exact and relative matches."""
+        files = index.files
+        meta = files.get(file_path)
+        if meta is not None:
+            return meta
+        keys = list(files)
+        if keys != path_keys:
+            path_keys[:] = keys
+            path_order.clear()
+            path_order.update(zip(keys, range(len(keys))))
+            by_reversed = sorted((path[::-1], i) for i, path in enumerate(keys))
+            reversed_paths[:] = [rev for rev, _ in by_reversed]
+            reversed_order[:] = [i for _, i in by_reversed]
+        # The first stored path (in index order) that ends with file_path,
+        # or that file_path ends with, wins.
+        best = len(keys)
+        rev = file_path[::-1]
+        lo = bisect_left(reversed_paths, rev)
+        hi = bisect_right(reversed_paths, rev, lo, key=lambda r: r[: len(rev)])
+        if lo < hi:
+            best = min(reversed_order[lo:hi])
+        for start in range(1, len(file_path) + 1):
+            i = path_order.get(file_path[start:])
+            if i is not None and i < best:
+                best = i
+        return files[keys[best]] if best < len(keys) else None
+
+    # Per-file query functions, built on first use. Keyed by source name and
+    # checked by identity, so a file replaced by reindexing gets fresh ones.
+    # Once a cache holds as many entries as the index has files, entries for
+    # files the index no longer holds are dropped before the next store.
+    file_funcs_cache: dict[str, tuple[StructuralMetadata, dict[str, Callable[..., Any]]]] = {}
+
+    def _file_funcs(meta: StructuralMetadata) -> dict[str, Callable[..., Any]]:
+        cached = file_funcs_cache.get(meta.source_name)
+        if cached is not None and cached[0] is meta:
+            return cached[1]
+        file_funcs = create_file_query_functions(meta)
+        if len(file_funcs_cache) >= len(index.files):
+            for name in file_funcs_cache.keys() - index.files.keys():
+                del file_funcs_cache[name]
+        file_funcs_cache[meta.source_name] = (meta, file_funcs)
+        return file_funcs
+
+    # Non-method functions per file for get_project_summary, cached the same way.
+    top_level_cache: dict[str, tuple[StructuralMetadata, list[FunctionInfo]]] = {}
+
+    def _top_level_functions(meta: StructuralMetadata) -> list[FunctionInfo]:
+        cached = top_level_cache.get(meta.source_name)
+        if cached is not None and cached[0] is meta:
+            return cached[1]
+        funcs = [f for f in meta.functions if not f.is_method]
+        if len(top_level_cache) >= len(index.files):
+            for name in top_level_cache.keys() - index.files.keys():
+                del top_level_cache[name]
+        top_level_cache[meta.source_name] = (meta, funcs)
+        return funcs
+
+    # First function / class defined under each name, scanning files in
+    # sorted order (functions match by name or qualified name). Built on
+    # first use and rebuilt once index.files no longer holds the same
+    # metadata objects, e.g. after an incremental reindex.
+    symbol_index_files: list[StructuralMetadata] | None = None
+    first_function: dict[str, tuple[str, StructuralMetadata, FunctionInfo]] = {}
+    first_class: dict[str, tuple[str, StructuralMetadata, ClassInfo]] = {}
+
+    def _refresh_symbol_index() -> None:
+        nonlocal symbol_index_files
+        files = index.files
+        if (
+            symbol_index_files is not None
+            and len(symbol_index_files) == len(files)
+            and all(map(is_, symbol_index_files, files.values()))
+        ):
+            return
+        first_function.clear()
+        first_class.clear()
+        for path, meta in sorted(files.items()):
+            for func in meta.functions:
+                entry = (path, meta, func)
+                first_function.setdefault(func.name, entry)
+                first_function.setdefault(func.qualified_name, entry)
+            for cls in meta.classes:
+                first_class.setdefault(cls.name, (path, meta, cls))
+        symbol_index_files = list(files.values())
 
     def get_project_summary() -> str:
         """High-level overview: file count, packages, top classes/functions."""
@@ -282,26 +459,29 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
         if packages:
             parts.append(f"Packages: {', '.join(packages)}")
 
-        # Top classes
-        all_classes = []
-        for path, meta in index.files.items():
-            for cls in meta.classes:
-                all_classes.append(f"{cls.name} ({path})")
-        if all_classes:
-            parts.append(f"Classes: {', '.join(all_classes[:20])}")
-            if len(all_classes) > 20:
-                parts.append(f"  ... and {len(all_classes) - 20} more")
+        # Top classes; only the first 20 are formatted, the rest are counted
+        files = index.files.items()
+        class_count = sum(len(meta.classes) for _, meta in files)
+        if class_count:
+            shown = islice(
+                (f"{cls.name} ({path})" for path, meta in files for cls in meta.classes),
+                20,
+            )
+            parts.append(f"Classes: {', '.join(shown)}")
+            if class_count > 20:
+                parts.append(f"  ... and {class_count - 20} more")
 
         # Top functions (non-method)
-        all_funcs = []
-        for path, meta in index.files.items():
-            for func in meta.functions:
-                if not func.is_method:
-                    all_funcs.append(f"{func.name} ({path})")
-        if all_funcs:
-            parts.append(f"Functions: {', '.join(all_funcs[:20])}")
-            if len(all_funcs) > 20:
-                parts.append(f"  ... and {len(all_funcs) - 20} more")
+        top_level = [(path, _top_level_functions(meta)) for path, meta in files]
+        func_count = sum(len(funcs) for _, funcs in top_level)
+        if func_count:
+            shown = islice(
+                (f"{func.name} ({path})" for path, funcs in top_level for func in funcs),
+                20,
+            )
+            parts.append(f"Functions: {', '.join(shown)}")
+            if func_count > 20:
+                parts.append(f"  ... and {func_count - 20} more")
 
         return "\n".join(parts)
 
@@ -318,27 +498,27 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
         """Per-file or project-level summary."""
         if file_path is None:
             return get_project_summary()
-        meta = _resolve_file(index, file_path)
+        meta = _resolve_file(file_path)
         if meta is None:
             return f"Error: file '{file_path}' not found in index"
-        file_funcs = create_file_query_functions(meta)
+        file_funcs = _file_funcs(meta)
         return file_funcs["get_structure_summary"]()
 
     def get_lines(file_path: str, start: int, end: int) -> str:
         """Lines from a specific file."""
-        meta = _resolve_file(index, file_path)
+        meta = _resolve_file(file_path)
         if meta is None:
             return f"Error: file '{file_path}' not found in index"
-        file_funcs = create_file_query_functions(meta)
+        file_funcs = _file_funcs(meta)
         return file_funcs["get_lines"](start, end)
 
     def get_functions(file_path: str | None = None, max_results: int = 0) -> list[dict]:
         """Functions in a file, or all functions across the project."""
         if file_path is not None:
-            meta = _resolve_file(index, file_path)
+            meta = _resolve_file(file_path)
             if meta is None:
                 return [{"error": f"file '{file_path}' not found in index"}]
-            file_funcs = create_file_query_functions(meta)
+            file_funcs = _file_funcs(meta)
             result = file_funcs["get_functions"]()
         else:
             # All functions across project
@@ -361,10 +541,10 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
     def get_classes(file_path: str | None = None, max_results: int = 0) -> list[dict]:
         """Classes in a file or across the project."""
         if file_path is not None:
-            meta = _resolve_file(index, file_path)
+            meta = _resolve_file(file_path)
             if meta is None:
                 return [{"error": f"file '{file_path}' not found in index"}]
-            file_funcs = create_file_query_functions(meta)
+            file_funcs = _file_funcs(meta)
             result = file_funcs["get_classes"]()
         else:
             result = []
@@ -384,10 +564,10 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
     def get_imports(file_path: str | None = None, max_results: int = 0) -> list[dict]:
         """Imports in a file or across the project."""
         if file_path is not None:
-            meta = _resolve_file(index, file_path)
+            meta = _resolve_file(file_path)
             if meta is None:
                 return [{"error": f"file '{file_path}' not found in index"}]
-            file_funcs = create_file_query_functions(meta)
+            file_funcs = _file_funcs(meta)
             result = file_funcs["get_imports"]()
         else:
             result = []
@@ -410,36 +590,35 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
         """Source of a function, uses symbol_table to find file if not specified."""
         source: str | None = None
         if file_path is not None:
-            meta = _resolve_file(index, file_path)
+            meta = _resolve_file(file_path)
             if meta is None:
                 return f"Error: file '{file_path}' not found in index"
-            file_funcs = create_file_query_functions(meta)
+            file_funcs = _file_funcs(meta)
             source = file_funcs["get_function_source"](name)
         else:
             # Try symbol table
             if name in index.symbol_table:
                 resolved_path = index.symbol_table[name]
-                meta = _resolve_file(index, resolved_path)
+                meta = _resolve_file(resolved_path)
                 if meta is not None:
-                    file_funcs = create_file_query_functions(meta)
+                    file_funcs = _file_funcs(meta)
                     result = file_funcs["get_function_source"](name)
                     if not result.startswith("Error:"):
                         source = result
             # Search all files
             if source is None:
-                for path, meta in sorted(index.files.items()):
-                    for f in meta.functions:
-                        if f.name == name or f.qualified_name == name:
-                            source = "\n".join(
-                                meta.lines[f.line_range.start - 1 : f.line_range.end]
-                            )
-                            break
-                    if source is not None:
-                        break
+                _refresh_symbol_index()
+                found = first_function.get(name)
+                if found is not None:
+                    _, meta, f = found
+                    source = "\n".join(
+                        meta.lines[f.line_range.start - 1 : f.line_range.end]
+                    )
         if source is None:
             return f"Error: function '{name}' not found in project"
         if max_lines > 0:
-            lines = source.split("\n")
+            # Split off only the lines that are kept, not the whole body
+            lines = source.split("\n", max_lines)
             if len(lines) > max_lines:
                 source = "\n".join(lines[:max_lines])
                 source += f"\n... (truncated to {max_lines} lines)"
@@ -451,36 +630,35 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
         """Source of a class, uses symbol_table to find file if not specified."""
         source: str | None = None
         if file_path is not None:
-            meta = _resolve_file(index, file_path)
+            meta = _resolve_file(file_path)
             if meta is None:
                 return f"Error: file '{file_path}' not found in index"
-            file_funcs = create_file_query_functions(meta)
+            file_funcs = _file_funcs(meta)
             source = file_funcs["get_class_source"](name)
         else:
             # Try symbol table
             if name in index.symbol_table:
                 resolved_path = index.symbol_table[name]
-                meta = _resolve_file(index, resolved_path)
+                meta = _resolve_file(resolved_path)
                 if meta is not None:
-                    file_funcs = create_file_query_functions(meta)
+                    file_funcs = _file_funcs(meta)
                     result = file_funcs["get_class_source"](name)
                     if not result.startswith("Error:"):
                         source = result
             # Search all files
             if source is None:
-                for path, meta in sorted(index.files.items()):
-                    for cls in meta.classes:
-                        if cls.name == name:
-                            source = "\n".join(
-                                meta.lines[cls.line_range.start - 1 : cls.line_range.end]
-                            )
-                            break
-                    if source is not None:
-                        break
+                _refresh_symbol_index()
+                found = first_class.get(name)
+                if found is not None:
+                    _, meta, cls = found
+                    source = "\n".join(
+                        meta.lines[cls.line_range.start - 1 : cls.line_range.end]
+                    )
         if source is None:
             return f"Error: class '{name}' not found in project"
         if max_lines > 0:
-            lines = source.split("\n")
+            # Split off only the lines that are kept, not the whole body
+            lines = source.split("\n", max_lines)
             if len(lines) > max_lines:
                 source = "\n".join(lines[:max_lines])
                 source += f"\n... (truncated to {max_lines} lines)"
@@ -516,7 +694,7 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
         # Try symbol table first
         if name in index.symbol_table:
             path = index.symbol_table[name]
-            meta = _resolve_file(index, path)
+            meta = _resolve_file(path)
             if meta is not None:
                 for func in meta.functions:
                     if func.name == name or func.qualified_name == name:
@@ -524,14 +702,16 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
                 for cls in meta.classes:
                     if cls.name == name:
                         return _class_result(cls, path, meta)
-        # Fallback: search all files
-        for path, meta in sorted(index.files.items()):
-            for func in meta.functions:
-                if func.name == name or func.qualified_name == name:
-                    return _func_result(func, path, meta)
-            for cls in meta.classes:
-                if cls.name == name:
-                    return _class_result(cls, path, meta)
+        # Fallback: search all files; within a file, functions come first
+        _refresh_symbol_index()
+        func_hit = first_function.get(name)
+        cls_hit = first_class.get(name)
+        if func_hit is not None and (cls_hit is None or func_hit[0] <= cls_hit[0]):
+            path, meta, func = func_hit
+            return _func_result(func, path, meta)
+        if cls_hit is not None:
+            path, meta, cls = cls_hit
+            return _class_result(cls, path, meta)
         return {"name": name}
 
     def find_symbol(name: str) -> dict:
@@ -575,7 +755,7 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
         return [_resolve_symbol_info(dep) for dep in result]
 
     def get_call_chain(from_name: str, to_name: str) -> dict:
-        """Shortest path in dependency graph (BFS).
+        """Shortest path in dependency graph (bidirectional BFS).
 
         Returns {chain: [{name, file, line, end_line, type, signature, source_preview}, ...]}
         with rich info for each hop, so callers don't need follow-up lookups.
@@ -586,24 +766,56 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
             info = _resolve_symbol_info(from_name)
             info.setdefault("name", from_name)
             return {"chain": [info]}
+        # Nothing depends on to_name, so no path can end there
+        if to_name not in index.reverse_dependency_graph:
+            return {"error": f"no path from '{from_name}' to '{to_name}'"}
 
-        # BFS
-        visited = {from_name}
-        queue: deque[list[str]] = deque([[from_name]])
-        path_names: list[str] | None = None
-        while queue:
-            path = queue.popleft()
-            current = path[-1]
-            neighbors = index.global_dependency_graph.get(current, set())
-            for neighbor in sorted(neighbors):
-                if neighbor == to_name:
-                    path_names = path + [neighbor]
-                    break
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append(path + [neighbor])
-            if path_names is not None:
-                break
+        # Bidirectional BFS: grow whichever frontier is smaller by one full
+        # level, forward along dependencies or backward along dependents,
+        # until a newly reached symbol has been seen from the other side.
+        forward_depth = {from_name: 0}
+        backward_depth = {to_name: 0}
+        forward_frontier = [from_name]
+        backward_frontier = [to_name]
+        meetings: list[str] = []
+        while forward_frontier and backward_frontier and not meetings:
+            forward = len(forward_frontier) <= len(backward_frontier)
+            if forward:
+                frontier, depth, seen_other, graph = (
+                    forward_frontier, forward_depth, backward_depth,
+                    index.global_dependency_graph,
+                )
+            else:
+                frontier, depth, seen_other, graph = (
+                    backward_frontier, backward_depth, forward_depth,
+                    index.reverse_dependency_graph,
+                )
+            level = depth[frontier[0]] + 1
+            next_frontier = []
+            for current in frontier:
+                for neighbor in graph.get(current, _NO_DEPS):
+                    if neighbor not in depth:
+                        depth[neighbor] = level
+                        next_frontier.append(neighbor)
+                        if neighbor in seen_other:
+                            meetings.append(neighbor)
+            if forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+        path_names = (
+            _smallest_shortest_path(
+                from_name,
+                index.global_dependency_graph,
+                index.reverse_dependency_graph,
+                forward_depth,
+                backward_depth,
+                meetings,
+            )
+            if meetings
+            else None
+        )
 
         if path_names is None:
             return {"error": f"no path from '{from_name}' to '{to_name}'"}
@@ -640,22 +852,34 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
     def search_codebase(pattern: str, max_results: int = 100) -> list[dict]:
         """Regex across all files, returns [{file, line_number, content}]."""
         try:
-            regex = re.compile(pattern)
+            search = _compile(pattern).search
         except re.error as e:
             return [{"error": f"Invalid regex: {e}"}]
+        # Line-local patterns scan each file's text in one regex call instead
+        # of one call per line; anything else is searched line by line.
+        scan = (
+            None
+            if _NOT_LINE_LOCAL.search(pattern)
+            else _compile(pattern, re.MULTILINE).search
+        )
         limit = max_results if max_results > 0 else 0
         results = []
         for path in sorted(index.files.keys()):
             meta = index.files[path]
-            for i, line in enumerate(meta.lines):
-                if regex.search(line):
-                    results.append({
-                        "file": path,
-                        "line_number": i + 1,
-                        "content": line,
-                    })
-                    if limit and len(results) >= limit:
-                        return results
+            lines = meta.lines
+            hits: Iterator[int]
+            if scan is None:
+                hits = (i for i, line in enumerate(lines) if search(line))
+            else:
+                hits = _matching_lines(scan, search, lines, "\n".join(lines))
+            for i in hits:
+                results.append({
+                    "file": path,
+                    "line_number": i + 1,
+                    "content": lines[i],
+                })
+                if limit and len(results) >= limit:
+                    return results
         return results
 
     def get_change_impact(
@@ -669,21 +893,21 @@ def create_project_query_functions(index: ProjectIndex) -> dict[str, Callable]:
         if max_direct > 0:
             direct_list = direct_list[:max_direct]
 
-        # BFS for transitive dependents
-        transitive = set()
-        queue = deque(list(direct))
-        visited = set(direct) | {name}
+        # BFS for transitive dependents. visited starts with the direct ones,
+        # so everything reached from here on is transitive only.
+        reverse_graph = index.reverse_dependency_graph
+        visited = set(direct)
+        visited.add(name)
+        transitive: list[str] = []
+        queue = deque(direct)
         while queue:
-            current = queue.popleft()
-            transitive.add(current)
-            next_deps = index.reverse_dependency_graph.get(current, set())
-            for dep in next_deps:
-                if dep not in visited:
-                    visited.add(dep)
-                    queue.append(dep)
-
-        # Transitive = everything reachable beyond direct
-        transitive_only = sorted(transitive - set(sorted(direct)))
+            fresh = reverse_graph.get(queue.popleft(), _NO_DEPS) - visited
+            if fresh:
+                visited |= fresh
+                transitive.extend(fresh)
+                queue.extend(fresh)
+
+        transitive_only = sorted(transitive)
         if max_transitive > 0:
             transitive_only = transitive_only[:max_transitive]
 
@@ -41,7 +41,7 @@ from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 import mcp.types as types
 
-from mcp_codebase_index.git_tracker import is_git_repo, get_head_commit, get_changed_files
+from mcp_codebase_index.git_tracker import get_changed_files
 from mcp_codebase_index.models import ProjectIndex
 from mcp_codebase_index.project_indexer import ProjectIndexer
 from mcp_codebase_index.query_api import create_project_query_functions
@@ -219,15 +219,16 @@ def _ensure_index() -> None:
         return
 
     _project_root = os.environ.get("PROJECT_ROOT", os.getcwd())
-    _is_git = is_git_repo(_project_root)
+    indexer = ProjectIndexer(_project_root)
+    _is_git = indexer.is_git_repo()
 
     cached_index = _load_cache(_project_root)
     if cached_index is not None and _is_git and cached_index.last_indexed_git_ref:
-        current_head = get_head_commit(_project_root)
+        current_head = indexer.head_commit()
         if current_head == cached_index.last_indexed_git_ref:
             # Exact match — use cache directly
             print("[mcp-codebase-index] Cache hit (git ref matches)", file=sys.stderr)
-            _indexer = ProjectIndexer(_project_root)
+            _indexer = indexer
             _indexer._project_index = cached_index
             _query_fns = create_project_query_functions(cached_index)
             return
@@ -241,7 +242,7 @@ def _ensure_index() -> None:
                 f"applying incremental update",
                 file=sys.stderr,
             )
-            _indexer = ProjectIndexer(_project_root)
+            _indexer = indexer
             _indexer._project_index = cached_index
             _query_fns = create_project_query_functions(cached_index)
             # _maybe_incremental_update will handle the rest on first tool call
@@ -252,25 +253,28 @@ def _ensure_index() -> None:
             file=sys.stderr,
         )
 
-    _build_index()
+    _build_index(indexer)
 
 
-def _build_index() -> None:
-    """Build (or rebuild) the project index and query functions."""
+def _build_index(indexer: ProjectIndexer | None = None) -> None:
+    """Build (or rebuild) the project index and query functions.
+
+    Reuses the given indexer (and the git state it has already looked up)
+    when called from _ensure_index; otherwise starts from a fresh one.
+    """
     global _project_root, _indexer, _query_fns, _is_git
 
     if not _project_root:
         _project_root = os.environ.get("PROJECT_ROOT", os.getcwd())
     print(f"[mcp-codebase-index] Indexing project: {_project_root}", file=sys.stderr)
 
-    _indexer = ProjectIndexer(_project_root)
+    _indexer = indexer if indexer is not None else ProjectIndexer(_project_root)
     index = _indexer.index()
     _query_fns = create_project_query_functions(index)
 
-    if not _is_git:
-        _is_git = is_git_repo(_project_root)
+    _is_git = _indexer.is_git_repo()
     if _is_git:
-        index.last_indexed_git_ref = get_head_commit(_project_root)
+        index.last_indexed_git_ref = _indexer.head_commit()
         _save_cache(index)
 
     print(
@@ -334,7 +338,7 @@ def _maybe_incremental_update() -> None:
     _indexer.rebuild_graphs()
 
     # Update the git ref
-    idx.last_indexed_git_ref = get_head_commit(_project_root)
+    idx.last_indexed_git_ref = _indexer.head_commit(refresh=True)
 
     n_mod = len(changeset.modified)
     n_add = len(changeset.added)
@@ -23,17 +23,6 @@ import re
 from mcp_codebase_index.models import LineRange, SectionInfo, StructuralMetadata
 
 
-def _build_line_offsets(text: str, lines: list[str]) -> list[int]:
-    """Compute character offset of each line start."""
-    offsets: list[int] = []
-    pos = 0
-    for line in lines:
-        offsets.append(pos)
-        # +1 for the newline character (or end of string)
-        pos += len(line) + 1
-    return offsets
-
-
 def annotate_text(text: str, source_name: str = "<text>") -> StructuralMetadata:
     """Parse text/markdown and extract section structure.
 
@@ -55,7 +44,6 @@ def annotate_text(text: str, source_name: str = "<text>") -> StructuralMetadata:
     lines = text.split("\n")
     total_lines = len(lines)
     total_chars = len(text)
-    line_offsets = _build_line_offsets(text, lines)
 
     # First pass: detect headings as (line_index_0based, title, level)
     headings: list[tuple[int, str, int]] = []
@@ -150,6 +138,5 @@ def annotate_text(text: str, source_name: str = "<text>") -> StructuralMetadata:
         total_lines=total_lines,
         total_chars=total_chars,
         lines=lines,
-        line_char_offsets=line_offsets,
         sections=sections,
     )
@@ -37,15 +37,6 @@ from mcp_codebase_index.models import (
 )
 
 
-def _build_line_offsets(text: str, lines: list[str]) -> list[int]:
-    offsets: list[int] = []
-    pos = 0
-    for line in lines:
-        offsets.append(pos)
-        pos += len(line) + 1
-    return offsets
-
-
 def _find_brace_end(lines: list[str], start_line_0: int) -> int:
     """Starting from *start_line_0*, find the 0-based line index where
     the outermost opening brace is closed.  Returns *start_line_0* if
@@ -218,7 +209,6 @@ def annotate_typescript(source: str, source_name: str = "<source>") -> Structura
     lines = source.split("\n")
     total_lines = len(lines)
     total_chars = len(source)
-    line_offsets = _build_line_offsets(source, lines)
 
     imports = _parse_imports(lines)
 
@@ -400,7 +390,6 @@ def annotate_typescript(source: str, source_name: str = "<source>") -> Structura
         total_lines=total_lines,
         total_chars=total_chars,
         lines=lines,
-        line_char_offsets=line_offsets,
         functions=functions,
         classes=classes,
         imports=imports,
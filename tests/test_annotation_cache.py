@@ -0,0 +1,126 @@
+"""Tests for the content-addressed annotation cache."""
+
+import os
+
+from mcp_codebase_index.annotation_cache import AnnotationCache
+from mcp_codebase_index.annotator import annotate
+from mcp_codebase_index.project_indexer import ProjectIndexer
+
+SOURCE = "import os\n\n\ndef helper(x):\n    return os.path.join(x)\n"
+
+
+def _entries(cache_dir):
+    return [
+        os.path.join(dirpath, name)
+        for dirpath, _, names in os.walk(cache_dir)
+        for name in names
+        if name.endswith(".pkl")
+    ]
+
+
+class TestAnnotationCache:
+    def test_miss_then_hit_matches_annotate(self, tmp_path):
+        cache = AnnotationCache(str(tmp_path))
+        first = cache.annotate(SOURCE, source_name="mod.py")
+        assert len(_entries(tmp_path)) == 1
+
+        second = cache.annotate(SOURCE, source_name="mod.py")
+        expected = annotate(SOURCE, source_name="mod.py")
+        assert second.functions == expected.functions
+        assert second.imports == expected.imports
+        assert second.lines == first.lines
+        assert len(_entries(tmp_path)) == 1
+
+    def test_identical_content_keeps_caller_source_name(self, tmp_path):
+        cache = AnnotationCache(str(tmp_path))
+        cache.annotate(SOURCE, source_name="a.py")
+        meta = cache.annotate(SOURCE, source_name="b.py")
+        assert meta.source_name == "b.py"
+        assert len(_entries(tmp_path)) == 1
+
+    def test_file_type_is_part_of_key(self, tmp_path):
+        cache = AnnotationCache(str(tmp_path))
+        py_meta = cache.annotate(SOURCE, source_name="mod.py")
+        txt_meta = cache.annotate(SOURCE, source_name="mod.txt")
+        assert len(_entries(tmp_path)) == 2
+        assert py_meta.functions
+        assert not txt_meta.functions
+
+    def test_corrupt_entry_falls_back_to_annotate(self, tmp_path):
+        cache = AnnotationCache(str(tmp_path))
+        cache.annotate(SOURCE, source_name="mod.py")
+        (entry,) = _entries(tmp_path)
+        with open(entry, "wb") as f:
+            f.write(b"not a pickle")
+
+        meta = cache.annotate(SOURCE, source_name="mod.py")
+        assert [f.name for f in meta.functions] == ["helper"]
+
+    def test_annotate_bytes_decodes_only_on_miss(self, tmp_path):
+        cache = AnnotationCache(str(tmp_path))
+        data = SOURCE.encode()
+        calls = []
+
+        def decode(raw):
+            calls.append(raw)
+            return raw.decode()
+
+        first = cache.annotate_bytes(data, "mod.py", decode)
+        second = cache.annotate_bytes(data, "other.py", decode)
+        assert len(calls) == 1
+        assert second.functions == first.functions
+        assert second.source_name == "other.py"
+
+    def test_unchanged_stat_skips_read(self, tmp_path):
+        path = tmp_path / "mod.py"
+        path.write_text(SOURCE)
+        old = 1_000_000_000
+        os.utime(path, (old, old))
+        cache = AnnotationCache(str(tmp_path / "cache"))
+        reads = []
+
+        def read(p):
+            reads.append(p)
+            with open(p, "rb") as f:
+                return f.read()
+
+        first = cache.annotate_file(str(path), "mod.py", read, bytes.decode)
+        second = cache.annotate_file(str(path), "mod.py", read, bytes.decode)
+        assert len(reads) == 1
+        assert second.functions == first.functions
+
+        path.write_text(SOURCE + "\ndef other():\n    pass\n")
+        os.utime(path, (old + 1, old + 1))
+        third = cache.annotate_file(str(path), "mod.py", read, bytes.decode)
+        assert len(reads) == 2
+        assert [f.name for f in third.functions] == ["helper", "other"]
+
+    def test_recently_modified_file_is_always_read(self, tmp_path):
+        path = tmp_path / "mod.py"
+        path.write_text(SOURCE)
+        cache = AnnotationCache(str(tmp_path / "cache"))
+        reads = []
+
+        def read(p):
+            reads.append(p)
+            with open(p, "rb") as f:
+                return f.read()
+
+        cache.annotate_file(str(path), "mod.py", read, bytes.decode)
+        cache.annotate_file(str(path), "mod.py", read, bytes.decode)
+        assert len(reads) == 2
+
+
+class TestProjectIndexerWithCache:
+    def test_index_populates_and_reuses_cache(self, tmp_path):
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "mod.py").write_text(SOURCE)
+        cache_dir = tmp_path / "cache"
+
+        first = ProjectIndexer(str(project), cache_dir=str(cache_dir)).index()
+        assert len(_entries(cache_dir)) == 1
+
+        second = ProjectIndexer(str(project), cache_dir=str(cache_dir)).index()
+        assert second.symbol_table == first.symbol_table
+        assert second.files["mod.py"].source_name == "mod.py"
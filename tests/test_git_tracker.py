@@ -50,80 +50,164 @@ class TestGetHeadCommit:
             assert get_head_commit("/some/path") is None
 
 
+class TestInProcessHeadRead:
+    """HEAD is resolved from the .git directory without spawning git."""
+
+    SHA = "0123456789abcdef0123456789abcdef01234567"
+
+    def _no_subprocess(self):
+        return patch(
+            "mcp_codebase_index.git_tracker.subprocess.run",
+            side_effect=AssertionError("git should not be spawned"),
+        )
+
+    def test_loose_ref(self, tmp_path):
+        git_dir = tmp_path / ".git"
+        (git_dir / "refs" / "heads").mkdir(parents=True)
+        (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+        (git_dir / "refs" / "heads" / "main").write_text(self.SHA + "\n")
+        (tmp_path / "pkg").mkdir()
+
+        with self._no_subprocess():
+            assert is_git_repo(str(tmp_path / "pkg")) is True
+            assert get_head_commit(str(tmp_path)) == self.SHA
+
+    def test_packed_ref(self, tmp_path):
+        git_dir = tmp_path / ".git"
+        git_dir.mkdir()
+        (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+        (git_dir / "packed-refs").write_text(
+            "# pack-refs with: peeled fully-peeled sorted\n"
+            f"{self.SHA} refs/heads/main\n"
+        )
+
+        with self._no_subprocess():
+            assert get_head_commit(str(tmp_path)) == self.SHA
+
+    def test_detached_head_via_gitfile(self, tmp_path):
+        real_git_dir = tmp_path / "elsewhere"
+        real_git_dir.mkdir()
+        (real_git_dir / "HEAD").write_text(self.SHA + "\n")
+        work = tmp_path / "work"
+        work.mkdir()
+        (work / ".git").write_text("gitdir: ../elsewhere\n")
+
+        with self._no_subprocess():
+            assert get_head_commit(str(work)) == self.SHA
+
+    def test_unborn_branch_falls_back_to_git(self, tmp_path):
+        git_dir = tmp_path / ".git"
+        git_dir.mkdir()
+        (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+
+        with patch("mcp_codebase_index.git_tracker.subprocess.run") as mock_run:
+            mock_run.return_value = MagicMock(returncode=128, stdout="")
+            assert get_head_commit(str(tmp_path)) is None
+            mock_run.assert_called_once()
+
+
 class TestGetChangedFiles:
     def test_returns_empty_when_since_ref_is_none(self):
         changeset = get_changed_files("/some/path", None)
         assert changeset.is_empty
 
-    def test_parses_modified_files(self):
+    @staticmethod
+    def _mock_git(since_diff=b"", status=b""):
+        """Fake subprocess.run: committed diff output and working-tree status output."""
+
         def mock_run(cmd, **kwargs):
-            if cmd[:3] == ["git", "diff", "--name-status"] and len(cmd) == 5:
-                # committed changes: git diff --name-status <ref> HEAD
-                return MagicMock(returncode=0, stdout="M\tfoo.py\n")
-            return MagicMock(returncode=0, stdout="")
+            if cmd[:2] == ["git", "diff"] and cmd[-1] == "HEAD":
+                # committed changes: git diff --name-status --relative <ref> HEAD
+                return MagicMock(returncode=0, stdout=since_diff)
+            if cmd[:2] == ["git", "status"]:
+                return MagicMock(returncode=0, stdout=status)
+            return MagicMock(returncode=0, stdout=b"")
+
+        return mock_run
+
+    def _changed(self, **kwargs):
+        with patch(
+            "mcp_codebase_index.git_tracker.subprocess.run",
+            side_effect=self._mock_git(**kwargs),
+        ):
+            return get_changed_files("/some/path", "abc123")
 
-        with patch("mcp_codebase_index.git_tracker.subprocess.run", side_effect=mock_run):
-            changeset = get_changed_files("/some/path", "abc123")
-            assert "foo.py" in changeset.modified
+    def test_parses_modified_files(self):
+        changeset = self._changed(since_diff=b"M\tfoo.py\n")
+        assert "foo.py" in changeset.modified
 
     def test_parses_added_files(self):
-        def mock_run(cmd, **kwargs):
-            if cmd[:3] == ["git", "diff", "--name-status"] and len(cmd) == 5:
-                return MagicMock(returncode=0, stdout="A\tnew_file.py\n")
-            return MagicMock(returncode=0, stdout="")
-
-        with patch("mcp_codebase_index.git_tracker.subprocess.run", side_effect=mock_run):
-            changeset = get_changed_files("/some/path", "abc123")
-            assert "new_file.py" in changeset.added
+        changeset = self._changed(since_diff=b"A\tnew_file.py\n")
+        assert "new_file.py" in changeset.added
 
     def test_parses_deleted_files(self):
-        def mock_run(cmd, **kwargs):
-            if cmd[:3] == ["git", "diff", "--name-status"] and len(cmd) == 5:
-                return MagicMock(returncode=0, stdout="D\told_file.py\n")
-            return MagicMock(returncode=0, stdout="")
-
-        with patch("mcp_codebase_index.git_tracker.subprocess.run", side_effect=mock_run):
-            changeset = get_changed_files("/some/path", "abc123")
-            assert "old_file.py" in changeset.deleted
+        changeset = self._changed(since_diff=b"D\told_file.py\n")
+        assert "old_file.py" in changeset.deleted
 
     def test_rename_handling(self):
-        def mock_run(cmd, **kwargs):
-            if cmd[:3] == ["git", "diff", "--name-status"] and len(cmd) == 5:
-                return MagicMock(returncode=0, stdout="R100\told.py\tnew.py\n")
-            return MagicMock(returncode=0, stdout="")
-
-        with patch("mcp_codebase_index.git_tracker.subprocess.run", side_effect=mock_run):
-            changeset = get_changed_files("/some/path", "abc123")
-            assert "old.py" in changeset.deleted
-            assert "new.py" in changeset.added
+        changeset = self._changed(since_diff=b"R100\told.py\tnew.py\n")
+        assert "old.py" in changeset.deleted
+        assert "new.py" in changeset.added
 
     def test_overlap_resolution_added_and_deleted_becomes_modified(self):
         """If a file appears in both added and deleted, treat as modified."""
-
-        def mock_run(cmd, **kwargs):
-            if cmd[:3] == ["git", "diff", "--name-status"] and len(cmd) == 5:
-                # Committed: file was deleted
-                return MagicMock(returncode=0, stdout="D\toverlap.py\n")
-            if cmd == ["git", "diff", "--name-status"]:
-                # Unstaged: file was added
-                return MagicMock(returncode=0, stdout="A\toverlap.py\n")
-            return MagicMock(returncode=0, stdout="")
-
-        with patch("mcp_codebase_index.git_tracker.subprocess.run", side_effect=mock_run):
-            changeset = get_changed_files("/some/path", "abc123")
-            assert "overlap.py" in changeset.modified
-            assert "overlap.py" not in changeset.added
-            assert "overlap.py" not in changeset.deleted
+        # Committed: file was deleted; working tree: file is back, untracked
+        changeset = self._changed(since_diff=b"D\toverlap.py\n", status=b"? overlap.py\0")
+        assert "overlap.py" in changeset.modified
+        assert "overlap.py" not in changeset.added
+        assert "overlap.py" not in changeset.deleted
 
     def test_untracked_files_added(self):
-        def mock_run(cmd, **kwargs):
-            if cmd[:2] == ["git", "ls-files"]:
-                return MagicMock(returncode=0, stdout="untracked.py\n")
-            return MagicMock(returncode=0, stdout="")
-
-        with patch("mcp_codebase_index.git_tracker.subprocess.run", side_effect=mock_run):
-            changeset = get_changed_files("/some/path", "abc123")
-            assert "untracked.py" in changeset.added
+        changeset = self._changed(status=b"? untracked.py\0? sub dir/other.py\0")
+        assert "untracked.py" in changeset.added
+        assert "sub dir/other.py" in changeset.added
+
+    def test_status_staged_and_unstaged_changes(self):
+        status = (
+            b"1 M. N... 100644 100644 100644 aaa bbb staged.py\0"
+            b"1 .M N... 100644 100644 100644 aaa aaa unstaged file.py\0"
+            b"1 A. N... 000000 100644 100644 000 bbb new.py\0"
+            b"1 .D N... 100644 100644 000000 aaa aaa gone.py\0"
+        )
+        changeset = self._changed(status=status)
+        assert changeset.modified == ["staged.py", "unstaged file.py"]
+        assert changeset.added == ["new.py"]
+        assert changeset.deleted == ["gone.py"]
+
+    def test_status_rename_record(self):
+        status = b"2 R. N... 100644 100644 100644 aaa aaa R100 new.py\0old.py\0? extra.py\0"
+        changeset = self._changed(status=status)
+        assert "old.py" in changeset.deleted
+        assert changeset.added == ["extra.py", "new.py"]
+
+    def test_status_unmerged_is_modified(self):
+        status = b"u UU N... 100644 100644 100644 100644 aaa bbb ccc conflict.py\0"
+        changeset = self._changed(status=status)
+        assert changeset.modified == ["conflict.py"]
+
+    def test_status_paths_relative_to_subdirectory_root(self, tmp_path):
+        """Porcelain paths are repo-relative; a root below the top strips its prefix."""
+        git_dir = tmp_path / ".git"
+        git_dir.mkdir()
+        (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+        (tmp_path / "sub").mkdir()
+        status = (
+            b"1 .M N... 100644 100644 100644 aaa aaa sub/pkg/mod.py\0"
+            b"2 R. N... 100644 100644 100644 aaa aaa R100 sub/in.py\0other/out.py\0"
+            b"2 R. N... 100644 100644 100644 aaa aaa R100 other/away.py\0sub/left.py\0"
+            b"? sub/pkg/new.py\0"
+            b"? subway.py\0"
+        )
+        with patch(
+            "mcp_codebase_index.git_tracker.subprocess.run",
+            side_effect=self._mock_git(status=status),
+        ) as mock_run:
+            changeset = get_changed_files(str(tmp_path / "sub"), "abc123")
+        assert changeset.modified == ["pkg/mod.py"]
+        assert changeset.added == ["in.py", "pkg/new.py"]
+        assert changeset.deleted == ["left.py"]
+        # The prefix comes from the directory layout, not from git
+        assert all(call.args[0][:2] != ["git", "rev-parse"] for call in mock_run.call_args_list)
 
     def test_graceful_failure_git_not_found(self):
         with patch("mcp_codebase_index.git_tracker.subprocess.run") as mock_run:
@@ -248,6 +248,13 @@ class TestGoImportDetection:
         assert meta.imports[0].module == "github.com/user/repo/pkg"
         assert "pkg" in meta.imports[0].names
 
+    def test_names_shared_across_files(self):
+        a = annotate_go('import "net/http"\n\nfunc Get(ctx int) {}')
+        b = annotate_go('import "net/http"\n\nfunc Put(ctx int) {}')
+        assert a.imports[0].module is b.imports[0].module
+        assert a.imports[0].names[0] is b.imports[0].names[0]
+        assert a.functions[0].parameters[0] is b.functions[0].parameters[0]
+
 
 class TestGoDocComments:
     """Tests for doc comment extraction."""
@@ -393,7 +400,8 @@ class TestGoEdgeCases:
     def test_line_offsets(self):
         src = "abc\ndef\nghi"
         meta = annotate_go(src)
-        assert meta.line_char_offsets == [0, 4, 8]
+        assert meta.line_char_offsets.tolist() == [0, 4, 8]
+        assert meta.line_char_offsets.typecode == "q"
 
     def test_multiline_backtick_string(self):
         src = (
@@ -409,3 +417,34 @@ class TestGoEdgeCases:
         meta = annotate_go(src)
         assert len(meta.functions) == 1
         assert meta.functions[0].name == "query"
+
+    def test_multiline_backtick_string_unbalanced_brace(self):
+        src = (
+            'func tmpl() string {\n'
+            '\treturn `\n'
+            'if x {\n'
+            '`\n'
+            '}\n'
+            '\n'
+            'func after() {}\n'
+        )
+        meta = annotate_go(src)
+        names = [f.name for f in meta.functions]
+        assert names == ["tmpl", "after"]
+        assert meta.functions[0].line_range.end == 5
+
+    def test_rune_literals_do_not_open_strings_or_blocks(self):
+        src = (
+            'func quotes(r rune) bool {\n'
+            "\treturn r == '`' || r == '\"'\n"
+            '}\n'
+            '\n'
+            'func brace(r rune) bool {\n'
+            "\treturn r == '{' || r == '\\'' || r == '\\\\'\n"
+            '}\n'
+            '\n'
+            'func after() {}\n'
+        )
+        meta = annotate_go(src)
+        ranges = [(f.name, f.line_range.start, f.line_range.end) for f in meta.functions]
+        assert ranges == [("quotes", 1, 3), ("brace", 5, 7), ("after", 9, 9)]
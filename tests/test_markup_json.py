@@ -150,6 +150,11 @@ class TestJsonEdgeCases:
         assert meta.imports == []
         assert meta.total_lines > 0
 
+    def test_invalid_json_fallback_offsets_derived_lazily(self):
+        text = "not valid\njson {{\n"
+        meta = annotate_json(text)
+        assert meta.line_char_offsets.tolist() == [0, 10]
+
     def test_empty_object(self):
         meta = annotate_json("{}")
         assert meta.sections == []
@@ -179,7 +184,7 @@ class TestJsonEdgeCases:
     def test_line_char_offsets(self):
         text = '{\n  "a": 1\n}'
         meta = annotate_json(text)
-        assert meta.line_char_offsets == [0, 2, 11]
+        assert meta.line_char_offsets.tolist() == [0, 2, 11]
 
     def test_functions_classes_empty(self):
         text = '{"key": "value"}'
@@ -282,3 +287,13 @@ class TestAnnotatorDispatch:
         meta = annotate(text, file_type="json")
         titles = [s.title for s in meta.sections]
         assert "key" in titles
+
+    def test_repeat_annotation_returns_fresh_metadata(self):
+        from mcp_codebase_index.annotator import annotate
+
+        text = '{"memo": true}'
+        first = annotate(text, source_name="memo.json")
+        first.sections.clear()
+        again = annotate(text, source_name="memo.json")
+        assert again is not first
+        assert [s.title for s in again.sections] == ["memo"]
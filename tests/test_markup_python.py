@@ -425,3 +425,33 @@ class TestEdgeCases:
         source = "hello\nworld"
         meta = annotate_python(source, "chars.py")
         assert meta.total_chars == len(source)
+
+    def test_built_names_shared_across_files(self):
+        source = "class C(abc.ABC):\n    @app.route\n    def m(self, *args, **kwargs):\n        pass\n"
+        a = annotate_python(source, "a.py")
+        b = annotate_python(source + "\n", "b.py")
+        assert a.classes[0].base_classes[0] is b.classes[0].base_classes[0]
+        fa, fb = a.functions[0], b.functions[0]
+        assert fa.qualified_name is fb.qualified_name
+        assert fa.decorators[0] is fb.decorators[0]
+        assert all(x is y for x, y in zip(fa.parameters, fb.parameters))
+
+    def test_form_feed_does_not_shift_lines(self):
+        source = "x = 1\n\x0c\ndef after():\n    pass\n"
+        meta = annotate_python(source, "ff.py")
+        func = meta.functions[0]
+        assert meta.lines[func.line_range.start - 1] == "def after():"
+        assert meta.total_lines == 4
+
+    def test_crlf_lines_match_lf(self):
+        source = "def f():\n    pass\n"
+        crlf = annotate_python(source.replace("\n", "\r\n"), "crlf.py")
+        assert crlf.lines == annotate_python(source, "lf.py").lines
+
+    def test_build_graph_false_skips_dependency_graph(self):
+        full = annotate_python(SOURCE_DECORATORS_COMPLEX, "decorators.py")
+        bare = annotate_python(SOURCE_DECORATORS_COMPLEX, "decorators.py", build_graph=False)
+        assert full.dependency_graph
+        assert bare.dependency_graph == {}
+        assert bare.functions == full.functions
+        assert bare.imports == full.imports
@@ -613,7 +613,7 @@ class TestRustEdgeCases:
     def test_line_offsets(self):
         src = "abc\ndef\nghi"
         meta = annotate_rust(src)
-        assert meta.line_char_offsets == [0, 4, 8]
+        assert meta.line_char_offsets.tolist() == [0, 4, 8]
 
     def test_block_comment_with_braces(self):
         src = (
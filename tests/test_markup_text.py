@@ -150,7 +150,7 @@ class TestEdgeCases:
     def test_line_char_offsets(self):
         text = "abc\ndef\nghi"
         meta = annotate_text(text)
-        assert meta.line_char_offsets == [0, 4, 8]
+        assert meta.line_char_offsets.tolist() == [0, 4, 8]
 
     def test_functions_classes_imports_empty(self):
         text = "# Heading\nContent"
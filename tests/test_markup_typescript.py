@@ -210,7 +210,7 @@ class TestMetadata:
     def test_line_offsets(self):
         src = "abc\ndef\nghi"
         meta = annotate_typescript(src)
-        assert meta.line_char_offsets == [0, 4, 8]
+        assert meta.line_char_offsets.tolist() == [0, 4, 8]
 
     def test_sections_empty(self):
         """TypeScript annotator should not populate sections."""
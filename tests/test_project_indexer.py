@@ -13,6 +13,7 @@ Covers:
 
 import os
 import textwrap
+from unittest.mock import patch
 
 import pytest
 
@@ -238,6 +239,33 @@ class TestFileDiscovery:
         for f in idx.files:
             assert f.endswith(".py"), f"Non-Python file included: {f}"
 
+    def test_root_level_pattern_does_not_recurse(self, sample_project):
+        (sample_project / "top.py").write_text("x = 1\n")
+        indexer = ProjectIndexer(str(sample_project), include_patterns=["*.py"])
+        idx = indexer.index()
+
+        assert "top.py" in idx.files
+        assert all("/" not in f for f in idx.files)
+
+    def test_excluded_directories_are_not_walked(self, sample_project):
+        deps = sample_project / "node_modules" / "dep"
+        deps.mkdir(parents=True)
+        (deps / "index.js").write_text("module.exports = 1;\n")
+
+        scanned: list[str] = []
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            scanned.append(os.fspath(path))
+            return real_scandir(path)
+
+        indexer = ProjectIndexer(str(sample_project))
+        with patch("mcp_codebase_index.project_indexer.os.scandir", recording_scandir):
+            idx = indexer.index()
+
+        assert not any("node_modules" in f for f in idx.files)
+        assert not any("node_modules" in path for path in scanned)
+
 
 # ---------------------------------------------------------------------------
 # Test: symbol table
@@ -323,6 +351,17 @@ class TestImportGraph:
         # At least core.py and models.py import from utils
         assert len(importers) >= 2
 
+    def test_python_import_search_order(self, tmp_path):
+        # Root beats src/, and module.py beats module/__init__.py
+        for rel in ("pkg.py", "pkg/__init__.py", "src/pkg.py", "src/only/__init__.py"):
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("x = 1\n")
+        (tmp_path / "main.py").write_text("import pkg\nimport only\n")
+
+        idx = ProjectIndexer(str(tmp_path)).index()
+
+        assert idx.import_graph["main.py"] == {"pkg.py", "src/only/__init__.py"}
+
     def test_typescript_relative_import(self, ts_project):
         indexer = ProjectIndexer(
             str(ts_project),
@@ -436,6 +475,98 @@ class TestReindexFile:
         if "create_engine" in idx.symbol_table:
             assert idx.symbol_table["create_engine"] != core_path
 
+    def test_reindex_resolves_imports_of_added_and_removed_files(self, sample_project):
+        indexer = ProjectIndexer(str(sample_project))
+        idx = indexer.index()
+
+        src = sample_project / "src" / "myproject"
+        (src / "extra.py").write_text("def extra():\n    return 1\n")
+        (src / "user.py").write_text("from myproject.extra import extra\n")
+        indexer.reindex_file("src/myproject/extra.py")
+        indexer.reindex_file("src/myproject/user.py")
+
+        assert idx.import_graph["src/myproject/user.py"] == {"src/myproject/extra.py"}
+
+        indexer.remove_file("src/myproject/extra.py")
+        indexer.reindex_file("src/myproject/user.py")
+
+        assert "src/myproject/user.py" not in idx.import_graph
+
+    def test_reindex_keeps_reverse_import_graph_in_sync(self, sample_project):
+        indexer = ProjectIndexer(str(sample_project))
+        idx = indexer.index()
+
+        core = sample_project / "src" / "myproject" / "core.py"
+        core.write_text("from myproject.models import DataModel\n")
+        indexer.reindex_file("src/myproject/core.py", skip_graph_rebuild=True)
+        assert idx.reverse_import_graph == indexer._build_reverse_graph(idx.import_graph)
+
+        indexer.remove_file("tests/test_core.py")
+        assert idx.reverse_import_graph == indexer._build_reverse_graph(idx.import_graph)
+
+    def test_reindex_patches_dependency_graph_for_body_edits(self, sample_project):
+        indexer = ProjectIndexer(str(sample_project))
+        idx = indexer.index()
+        assert "helper" in idx.global_dependency_graph["CoreEngine.run"]
+        # The first reindex also registers method names, a symbol-set change
+        indexer.reindex_file("src/myproject/core.py")
+
+        core = sample_project / "src" / "myproject" / "core.py"
+        core.write_text(core.read_text().replace("return helper(model)", "return model"))
+        with patch.object(
+            indexer, "_build_global_dependency_graph", side_effect=AssertionError
+        ):
+            indexer.reindex_file("src/myproject/core.py")
+
+        assert "helper" not in idx.global_dependency_graph["CoreEngine.run"]
+        rebuilt = ProjectIndexer(str(sample_project))._build_global_dependency_graph(
+            idx.files, idx.symbol_table
+        )
+        assert idx.global_dependency_graph == rebuilt
+        assert idx.reverse_dependency_graph == indexer._build_reverse_graph(rebuilt)
+
+    def test_reindex_unedited_file_keeps_metadata(self, sample_project):
+        indexer = ProjectIndexer(str(sample_project))
+        idx = indexer.index()
+        utils_path = next(f for f in idx.files if f.endswith("utils.py"))
+        old = idx.files[utils_path]
+
+        # Touched but unedited: nothing is re-annotated
+        with patch.object(indexer, "_annotate", wraps=indexer._annotate) as annotate:
+            indexer.reindex_file(utils_path)
+            assert annotate.call_count == 0
+        assert idx.files[utils_path] is old
+
+        abs_utils = os.path.join(str(sample_project), utils_path)
+        with open(abs_utils, "a") as f:
+            f.write("\n")
+        indexer.reindex_file(utils_path)
+        assert idx.files[utils_path] is not old
+        assert idx.files[utils_path].total_chars == old.total_chars + 1
+
+    def test_reindex_after_assigning_index_rebuilds_dependency_graph(self, tmp_path):
+        (tmp_path / "a.py").write_text(
+            "def helper():\n    pass\n\n"
+            "def other():\n    pass\n\n"
+            "def main():\n    helper()\n    other()\n"
+        )
+        (tmp_path / "b.py").write_text(
+            "from a import other\n\ndef main():\n    other()\n"
+        )
+        # As when the server loads a pickled index: no per-file edges yet
+        indexer = ProjectIndexer(str(tmp_path))
+        indexer._project_index = ProjectIndexer(str(tmp_path)).index()
+        idx = indexer._project_index
+        assert idx.global_dependency_graph["main"] == {"helper", "other"}
+
+        a = tmp_path / "a.py"
+        a.write_text(a.read_text().replace("    other()\n", ""))
+        indexer.reindex_file("a.py")
+
+        fresh = ProjectIndexer(str(tmp_path)).index()
+        assert idx.global_dependency_graph == fresh.global_dependency_graph
+        assert idx.reverse_dependency_graph == fresh.reverse_dependency_graph
+
     def test_reindex_raises_without_initial_index(self, sample_project):
         indexer = ProjectIndexer(str(sample_project))
 
@@ -465,6 +596,107 @@ class TestStats:
 
         assert idx.total_files == len(idx.files)
 
+    def test_memory_measured_only_on_request(self, sample_project):
+        assert ProjectIndexer(str(sample_project)).index().index_memory_bytes == 0
+
+        idx = ProjectIndexer(str(sample_project)).index(compute_memory=True)
+        source_chars = sum(m.total_chars for m in idx.files.values())
+        # Counts the file contents, not just the top-level dict
+        assert idx.index_memory_bytes > source_chars
+
+
+# ---------------------------------------------------------------------------
+# Test: cached git state
+# ---------------------------------------------------------------------------
+
+
+class TestGitState:
+    def test_is_git_repo_checked_once(self, tmp_path):
+        indexer = ProjectIndexer(str(tmp_path))
+        with patch(
+            "mcp_codebase_index.project_indexer.is_git_repo", return_value=True
+        ) as mock_is_git:
+            assert indexer.is_git_repo() is True
+            assert indexer.is_git_repo() is True
+        mock_is_git.assert_called_once_with(indexer.root_path)
+
+    def test_head_commit_cached_until_refresh(self, tmp_path):
+        indexer = ProjectIndexer(str(tmp_path))
+        with patch(
+            "mcp_codebase_index.project_indexer.is_git_repo", return_value=True
+        ), patch(
+            "mcp_codebase_index.project_indexer.get_head_commit",
+            side_effect=["aaa", "bbb"],
+        ) as mock_head:
+            assert indexer.head_commit() == "aaa"
+            assert indexer.head_commit() == "aaa"
+            assert indexer.head_commit(refresh=True) == "bbb"
+        assert mock_head.call_count == 2
+
+    def test_head_commit_none_outside_git(self, tmp_path):
+        indexer = ProjectIndexer(str(tmp_path))
+        with patch(
+            "mcp_codebase_index.project_indexer.is_git_repo", return_value=False
+        ), patch("mcp_codebase_index.project_indexer.get_head_commit") as mock_head:
+            assert indexer.head_commit() is None
+        mock_head.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Test: parallel annotation
+# ---------------------------------------------------------------------------
+
+
+class TestParallelIndexing:
+    def test_parallel_matches_serial(self, sample_project):
+        serial = ProjectIndexer(str(sample_project), max_workers=1).index()
+        with patch("mcp_codebase_index.project_indexer._PARALLEL_MIN_FILES", 1):
+            parallel = ProjectIndexer(str(sample_project), max_workers=4).index()
+
+        assert list(parallel.files) == list(serial.files)
+        assert parallel.symbol_table == serial.symbol_table
+        assert parallel.import_graph == serial.import_graph
+        assert parallel.global_dependency_graph == serial.global_dependency_graph
+        assert parallel.total_lines == serial.total_lines
+
+    def test_free_threaded_uses_threads(self, sample_project):
+        serial = ProjectIndexer(str(sample_project), max_workers=1).index()
+        with patch(
+            "mcp_codebase_index.project_indexer._PARALLEL_MIN_FILES", 1
+        ), patch(
+            "mcp_codebase_index.project_indexer._gil_disabled", return_value=True
+        ), patch(
+            "mcp_codebase_index.project_indexer.ProcessPoolExecutor"
+        ) as mock_pool:
+            threaded = ProjectIndexer(str(sample_project), max_workers=4).index()
+        mock_pool.assert_not_called()
+        assert list(threaded.files) == list(serial.files)
+        assert threaded.symbol_table == serial.symbol_table
+
+    def test_small_project_skips_pool(self, sample_project):
+        with patch(
+            "mcp_codebase_index.project_indexer.ProcessPoolExecutor"
+        ) as mock_pool:
+            index = ProjectIndexer(str(sample_project), max_workers=4).index()
+        mock_pool.assert_not_called()
+        assert index.total_files > 0
+
+    def test_serial_prefetch_keeps_order_and_skips_unreadable(self, sample_project):
+        from mcp_codebase_index.project_indexer import _annotate_file, _annotate_prefetched
+
+        paths = sorted(str(p) for p in sample_project.rglob("*.py"))
+        jobs = [(p, os.path.relpath(p, sample_project), None) for p in paths]
+        jobs.insert(2, (str(sample_project / "missing.py"), "missing.py", None))
+
+        with patch("mcp_codebase_index.project_indexer._PREFETCH_DEPTH", 2):
+            results = _annotate_prefetched(jobs)
+
+        assert [r[0] for r in results] == [j[1] for j in jobs]
+        assert results[2][1] is None and results[2][2]
+        for (_, metadata, _), job in zip(results, jobs):
+            if metadata is not None:
+                assert metadata.functions == _annotate_file(job)[1].functions
+
 
 # ---------------------------------------------------------------------------
 # Integration test: index the actual mcp-codebase-index source
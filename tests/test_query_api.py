@@ -1,6 +1,11 @@
 """Tests for the structural query API (single-file and project-wide)."""
 
+import gc
+import re
+import weakref
+from unittest.mock import patch
 
+from mcp_codebase_index import query_api
 from mcp_codebase_index.models import (
     ClassInfo,
     FunctionInfo,
@@ -482,6 +487,28 @@ class TestProjectQueryFunctions:
         assert "Engine" in summary
         assert "Runner" in summary
 
+    def test_get_project_summary_caps_listed_functions(self):
+        meta = _make_metadata_a()
+        meta.functions = [
+            FunctionInfo(
+                name=f"f{i}",
+                qualified_name=f"f{i}",
+                line_range=LineRange(1, 1),
+                parameters=[],
+                decorators=[],
+                docstring=None,
+                is_method=False,
+                parent_class=None,
+            )
+            for i in range(25)
+        ]
+        self.index.files["src/many.py"] = meta
+        summary = self.funcs["get_project_summary"]()
+        # helper and main, then the first 18 of f0..f24
+        assert "f17 (src/many.py)" in summary
+        assert "f18 (src/many.py)" not in summary
+        assert "... and 7 more" in summary
+
     def test_list_files_all(self):
         files = self.funcs["list_files"]()
         assert len(files) == 3
@@ -618,6 +645,62 @@ class TestProjectQueryFunctions:
         chain = self.funcs["get_call_chain"]("nonexistent", "helper")
         assert "Error" in chain[0]
 
+    def test_get_call_chain_shortest_of_ties(self):
+        graph = {
+            "a": {"c", "b"},
+            "b": {"d"},
+            "c": {"d", "x"},
+            "d": {"e"},
+            "x": {"e"},
+        }
+        reverse: dict[str, set[str]] = {}
+        for source, targets in graph.items():
+            for target in targets:
+                reverse.setdefault(target, set()).add(source)
+        index = ProjectIndex(
+            root_path="/project",
+            global_dependency_graph=graph,
+            reverse_dependency_graph=reverse,
+        )
+        funcs = create_project_query_functions(index)
+        chain = funcs["get_call_chain"]("a", "e")["chain"]
+        assert [hop["name"] for hop in chain] == ["a", "b", "d", "e"]
+        chain = funcs["get_call_chain"]("b", "e")["chain"]
+        assert [hop["name"] for hop in chain] == ["b", "d", "e"]
+        assert "error" in funcs["get_call_chain"]("e", "a")
+
+    def test_get_call_chain_ties_resolved_from_the_start(self):
+        # The two searches can meet on the n12 route first, but the n06 route
+        # is the smaller of the tied chains and must win.
+        graph = {
+            "n00": {"n05"},
+            "n01": {"n12", "n08"},
+            "n04": {"n02", "n01", "n13"},
+            "n06": {"n10", "n07"},
+            "n07": {"n12"},
+            "n08": {"n04", "n06", "n12"},
+            "n10": {"n05", "n09", "n00"},
+            "n12": {"n00"},
+            "n13": {"n09", "n02", "n08"},
+        }
+        reverse: dict[str, set[str]] = {}
+        for source, targets in graph.items():
+            for target in targets:
+                reverse.setdefault(target, set()).add(source)
+        index = ProjectIndex(
+            root_path="/project",
+            global_dependency_graph=graph,
+            reverse_dependency_graph=reverse,
+        )
+        funcs = create_project_query_functions(index)
+        chain = funcs["get_call_chain"]("n13", "n05")["chain"]
+        assert [hop["name"] for hop in chain] == ["n13", "n08", "n06", "n10", "n05"]
+
+    def test_get_call_chain_target_without_dependents(self):
+        # Nothing references Runner.execute, so no chain can reach it
+        result = self.funcs["get_call_chain"]("main", "Runner.execute")
+        assert result == {"error": "no path from 'main' to 'Runner.execute'"}
+
     def test_get_file_dependencies(self):
         deps = self.funcs["get_file_dependencies"]("src/runner_mod.py")
         assert "src/engine_mod.py" in deps
@@ -649,6 +732,34 @@ class TestProjectQueryFunctions:
         results = self.funcs["search_codebase"]("[invalid")
         assert "error" in results[0]
 
+    def test_search_patterns_compiled_once(self):
+        query_api._compile.cache_clear()
+        self.funcs["search_codebase"]("class ")
+        misses = query_api._compile.cache_info().misses
+        self.funcs["search_codebase"]("class ")
+        assert query_api._compile.cache_info().misses == misses
+        # Errors are not cached: an invalid pattern reports every time.
+        assert "error" in self.funcs["search_codebase"]("[invalid")[0]
+        assert "error" in self.funcs["search_codebase"]("[invalid")[0]
+
+    def test_search_codebase_matches_line_by_line(self):
+        # Whole-file scanning must not change which lines match, including
+        # for patterns that could reach across a line break.
+        patterns = [
+            "", r"\n", r"\s+$", r"^\s*def", r"(?s)class.+", r"\Aclass",
+            r"\)$", r"(?<=\s)self", r"x*", r"[^a-z]{2}$", r":\s*\w",
+        ]
+        for pattern in patterns:
+            regex = re.compile(pattern)
+            expected = [
+                (path, i + 1)
+                for path in sorted(self.index.files)
+                for i, line in enumerate(self.index.files[path].lines)
+                if regex.search(line)
+            ]
+            results = self.funcs["search_codebase"](pattern, max_results=0)
+            assert [(r["file"], r["line_number"]) for r in results] == expected
+
     def test_get_change_impact(self):
         impact = self.funcs["get_change_impact"]("helper")
         assert "Engine.run" in impact["direct"]
@@ -664,6 +775,74 @@ class TestProjectQueryFunctions:
         impact = self.funcs["get_change_impact"]("nonexistent")
         assert "error" in impact
 
+    def test_get_change_impact_cycle(self):
+        # helper <- Engine.run <- Runner.execute <- helper, plus main
+        self.index.reverse_dependency_graph["Runner.execute"] = {"helper", "main"}
+        impact = self.funcs["get_change_impact"]("helper")
+        assert [d["name"] for d in impact["direct"]] == ["Engine.run"]
+        assert [t["name"] for t in impact["transitive"]] == ["Runner.execute", "main"]
+
+    def test_per_file_functions_follow_replaced_metadata(self):
+        with patch.object(
+            query_api, "create_file_query_functions",
+            wraps=query_api.create_file_query_functions,
+        ) as factory:
+            self.funcs["get_lines"]("src/engine_mod.py", 1, 1)
+            self.funcs["get_functions"]("src/engine_mod.py")
+            assert factory.call_count == 1
+
+            # A reindex swaps in new metadata for the file
+            self.index.files["src/engine_mod.py"] = _make_metadata_b()
+            assert "Runner" in self.funcs["get_lines"]("src/engine_mod.py", 1, 10)
+            assert factory.call_count == 2
+
+    def test_per_file_caches_drop_removed_files(self):
+        meta_a = _make_metadata_a()
+        meta_b = _make_metadata_b()
+        index = ProjectIndex(
+            root_path="/project",
+            files={meta_a.source_name: meta_a, meta_b.source_name: meta_b},
+        )
+        funcs = create_project_query_functions(index)
+        for path in list(index.files):
+            funcs["get_lines"](path, 1, 1)
+        funcs["get_project_summary"]()
+
+        removed = weakref.ref(meta_a)
+        del index.files[meta_a.source_name], meta_a
+        meta_c = _make_metadata_b()
+        meta_c.source_name = "other_mod.py"
+        index.files[meta_c.source_name] = meta_c
+        funcs["get_lines"]("other_mod.py", 1, 1)
+        funcs["get_project_summary"]()
+        gc.collect()
+        assert removed() is None
+
+    def test_file_path_suffix_matching(self):
+        summary = self.funcs["get_structure_summary"]
+        assert "runner_mod.py" in summary("runner_mod.py")
+        assert "runner_mod.py" in summary("/project/src/runner_mod.py")
+        # Plain string suffixes, first stored path wins
+        assert "engine_mod.py" in summary("mod.py")
+        assert "not found" in summary("src/other.py")
+
+        self.index.files["lib/other.py"] = _make_metadata_b()
+        assert "Error" not in summary("src/../lib/other.py")
+        del self.index.files["src/engine_mod.py"]
+        assert "runner_mod.py" in summary("mod.py")
+
+    def test_symbol_fallback_follows_index_changes(self):
+        self.index.symbol_table.clear()
+        assert self.funcs["find_symbol"]("helper")["file"] == "src/engine_mod.py"
+        assert self.funcs["find_symbol"]("Engine")["type"] == "class"
+        assert "def execute" in self.funcs["get_function_source"]("Runner.execute")
+        assert "class Runner" in self.funcs["get_class_source"]("Runner")
+
+        del self.index.files["src/engine_mod.py"]
+        assert "error" in self.funcs["find_symbol"]("helper")
+        assert "Error" in self.funcs["get_class_source"]("Engine")
+        assert self.funcs["find_symbol"]("Runner")["file"] == "src/runner_mod.py"
+
 
 # ---------------------------------------------------------------------------
 # Truncation / output size control tests
@@ -739,6 +918,13 @@ class TestOutputSizeControls:
         src = self.funcs["get_function_source"]("helper", max_lines=100)
         assert "truncated" not in src
 
+    def test_get_function_source_max_lines_boundary(self):
+        full = self.funcs["get_function_source"]("helper")
+        count = len(full.split("\n"))
+        assert self.funcs["get_function_source"]("helper", max_lines=count) == full
+        truncated = self.funcs["get_function_source"]("helper", max_lines=count - 1)
+        assert truncated.split("\n")[:-1] == full.split("\n")[: count - 1]
+
 
 # ---------------------------------------------------------------------------
 # System prompt instructions